@@ -0,0 +1,21 @@
+"""
+Benchmarks del proceso ETL OINAP
+Este paquete genera libros Excel sintéticos con la estructura de
+config.json (generator.py) y mide por separado y de punta a punta las
+fases de extracción, transformación y carga (suite.py), comparando los
+resultados con las líneas base guardadas en baselines.json.
+
+Uso (desde la carpeta del proyecto):
+    python -m benchmarks.generator data/benchmarks --files 4 --rows 20000 --width 30
+    python -m benchmarks.suite --scenario small
+    python -m benchmarks.suite --scenario medium --save-baseline
+"""
+
+import os
+import sys
+
+# Añadir el directorio src al path de Python de forma dinámica
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+src_dir = os.path.join(project_root, 'src')
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
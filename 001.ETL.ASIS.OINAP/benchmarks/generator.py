@@ -0,0 +1,256 @@
+"""
+Generador de libros Excel sintéticos
+Crea archivos con la misma estructura que los reportes de las filiales
+según 'excel.structure' de config.json: pestaña, celda de filial, fila de
+encabezados y columnas configuradas con su encabezado esperado. Las
+columnas no configuradas hasta 'width' se rellenan con datos de relleno,
+para medir el costo de hojas anchas.
+
+El XML del libro se escribe directamente y en streaming, con tabla de
+cadenas compartidas y fechas con formato de fecha, igual que un archivo
+guardado por Excel. (El modo write-only de openpyxl guarda las cadenas en
+línea, que openpyxl tarda varias veces más en leer, por lo que los tiempos
+de extracción no serían representativos.)
+
+Uso:
+    python -m benchmarks.generator <directorio> --files 4 --rows 20000 --width 30
+"""
+
+import io
+import os
+import random
+import zipfile
+import argparse
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+
+import benchmarks  # noqa: F401  (agrega src al path)
+from config_loader import config
+from openpyxl.utils import get_column_letter
+
+MESES = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio',
+         'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
+DIAS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+TIPOS = ['Inscrito Nuevo', 'Reinscrito']
+TIPO_EXCLUIDO = 'Pre-Inscrito'
+FILIALES = ['Lima', 'Arequipa', 'Cusco', 'Trujillo', 'Piura', 'Chiclayo', 'Huancayo',
+            'Iquitos', 'Tacna', 'Puno', 'Juliaca', 'Huaraz', 'Ica', 'Cajamarca', 'Ayacucho']
+
+
+def _value_generators(rng, groups, excluded_ratio):
+    """Generadores de valores por campo conocido de la estructura OINAP"""
+    start = datetime(2025, 1, 6)
+    return {
+        'mes': lambda: rng.choice(MESES),
+        'diaclase': lambda: rng.choice(DIAS),
+        'fechainicio': lambda: start + timedelta(weeks=rng.randrange(52)),
+        'grupo': lambda: f"Grupo {rng.randrange(groups) + 1:02d}",
+        'tipoinscrito': lambda: TIPO_EXCLUIDO if rng.random() < excluded_ratio else rng.choice(TIPOS)
+    }
+
+
+_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        f'<Relationships xmlns="{_PKG_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        f'<Relationships xmlns="{_PKG_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{_REL_NS}/sharedStrings" Target="sharedStrings.xml"/>'
+        f'<Relationship Id="rId3" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # Estilo 0: general; estilo 1: fecha (numFmtId 14)
+    'xl/styles.xml': (
+        f'<styleSheet xmlns="{_MAIN_NS}">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+        '<borders count="1"><border/></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    )
+}
+
+
+class _SheetWriter:
+    """Escribe las filas de una hoja en streaming registrando las cadenas compartidas"""
+
+    def __init__(self, stream, width):
+        self.stream = stream
+        self.letters = [get_column_letter(index + 1) for index in range(width)]
+        self.strings = {}
+        self.row_number = 0
+
+    def _cell(self, ref, value):
+        if value is None:
+            return ''
+        if isinstance(value, datetime):
+            serial = (value - _EXCEL_EPOCH).total_seconds() / 86400
+            return f'<c r="{ref}" s="1"><v>{serial:g}</v></c>'
+        if isinstance(value, (int, float)):
+            return f'<c r="{ref}"><v>{value}</v></c>'
+        index = self.strings.setdefault(value, len(self.strings))
+        return f'<c r="{ref}" t="s"><v>{index}</v></c>'
+
+    def append(self, values):
+        self.row_number += 1
+        cells = ''.join(
+            self._cell(f"{self.letters[index]}{self.row_number}", value)
+            for index, value in enumerate(values)
+        )
+        self.stream.write(f'<row r="{self.row_number}">{cells}</row>')
+
+
+def _write_xlsx(path, sheet_name, width, height, rows):
+    """
+    Escribe un libro de una hoja a partir de un iterable de 'height' filas
+    (listas de valores). Como Excel, declara la dimensión de la hoja: sin
+    ella openpyxl recorre la hoja completa para calcularla.
+    """
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, content in _STATIC_PARTS.items():
+            zf.writestr(name, _XML + content)
+        zf.writestr('xl/workbook.xml', _XML + (
+            f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheets>'
+            f'<sheet name="{escape(sheet_name, {chr(34): "&quot;"})}" sheetId="1" r:id="rId1"/>'
+            '</sheets></workbook>'
+        ))
+
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as raw:
+            stream = io.TextIOWrapper(raw, encoding='utf-8')
+            stream.write(_XML + f'<worksheet xmlns="{_MAIN_NS}">'
+                         f'<dimension ref="A1:{get_column_letter(width)}{height}"/><sheetData>')
+            sheet = _SheetWriter(stream, width)
+            for values in rows:
+                sheet.append(values)
+            stream.write('</sheetData></worksheet>')
+            stream.flush()
+            stream.detach()
+
+        strings = ''.join(f'<si><t>{escape(value)}</t></si>' for value in sheet.strings)
+        zf.writestr('xl/sharedStrings.xml', _XML + (
+            f'<sst xmlns="{_MAIN_NS}" count="{len(sheet.strings)}" uniqueCount="{len(sheet.strings)}">'
+            f'{strings}</sst>'
+        ))
+
+
+def generate_workbook(path, filial, rows, width=0, groups=12, excluded_ratio=0.1, seed=0):
+    """
+    Genera un libro con la estructura configurada.
+
+    Args:
+        path (str): Ruta del archivo .xlsx a crear
+        filial (str): Valor de la celda de filial
+        rows (int): Filas de datos
+        width (int): Cantidad total de columnas de la hoja (como mínimo
+            hasta la última columna configurada)
+        groups (int): Cantidad de grupos distintos por filial
+        excluded_ratio (float): Proporción de filas 'Pre-Inscrito'
+        seed (int): Semilla para que el contenido sea reproducible
+
+    Returns:
+        str: Ruta del archivo generado
+    """
+    spec = config.excel_spec
+    rng = random.Random(seed)
+    generators = _value_generators(rng, groups, excluded_ratio)
+    width = max(width, spec.max_col)
+    configured = {column.index - 1: column for column in spec.columns}
+
+    # Valor de cada columna configurada: generador conocido o según su tipo
+    fields = []
+    for index, column in configured.items():
+        if column.field in generators:
+            generate = generators[column.field]
+        elif column.dtype == 'date':
+            generate = generators['fechainicio']
+        else:
+            generate = lambda field=column.field: f"{field} {rng.randrange(100)}"
+        fields.append((index, generate))
+    fillers = [index for index in range(width) if index not in configured]
+
+    def sheet_rows():
+        for row_number in range(1, spec.header_row):
+            row = [None] * width
+            if row_number == spec.filial_row:
+                if spec.filial_index > 1:
+                    row[spec.filial_index - 2] = 'Filial:'
+                row[spec.filial_index - 1] = filial
+            yield row
+
+        header = [f"Columna {index + 1}" for index in range(width)]
+        for index, column in configured.items():
+            header[index] = column.expected_name
+        yield header
+
+        for number in range(1, rows + 1):
+            row = [None] * width
+            # Relleno con un vocabulario acotado, como los datos reales
+            for index in fillers:
+                row[index] = f"dato {(number + index) % 50}"
+            for index, generate in fields:
+                row[index] = generate()
+            yield row
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    # Se escribe en un temporal para no dejar archivos incompletos reutilizables
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    _write_xlsx(tmp_path, spec.sheet_name, width, spec.header_row + rows, sheet_rows())
+    os.replace(tmp_path, path)
+    return path
+
+
+def generate_dataset(directory, files, rows, width=0, seed=0):
+    """
+    Genera 'files' libros (una filial cada uno) en el directorio indicado.
+    Los archivos ya generados con los mismos parámetros se reutilizan.
+
+    Returns:
+        list: Rutas de los archivos en orden
+    """
+    paths = []
+    for number in range(files):
+        filial = FILIALES[number % len(FILIALES)]
+        if number >= len(FILIALES):
+            filial = f"{filial} {number // len(FILIALES) + 1}"
+        name = f"bench_{number + 1:03d}_{rows}r_{width}c_s{seed}.xlsx"
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            generate_workbook(path, filial, rows, width=width, seed=seed + number)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera libros Excel sintéticos con la estructura OINAP")
+    parser.add_argument('directory', help="Directorio de salida")
+    parser.add_argument('--files', type=int, default=4, help="Cantidad de archivos (una filial por archivo)")
+    parser.add_argument('--rows', type=int, default=10000, help="Filas de datos por archivo")
+    parser.add_argument('--width', type=int, default=0, help="Cantidad total de columnas de la hoja")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla de los datos")
+    args = parser.parse_args()
+    for generated in generate_dataset(args.directory, args.files, args.rows, args.width, args.seed):
+        print(generated)
@@ -0,0 +1,253 @@
+"""
+Suite de benchmarks del proceso ETL
+Mide sobre libros sintéticos (generator.py) el tiempo de:
+- extract: ExcelDownloader.extract_data de cada archivo
+- transform: ExcelProcessor.process_files
+- load: ExcelWriter.update_consolidated
+- end_to_end: las tres fases seguidas, incluida la copia de las fuentes
+  locales al almacén de descargas (ExcelDownloader.process_urls)
+
+Cada medición se repite '--repeat' veces y se reporta el mínimo (el valor
+menos afectado por el ruido de la máquina). Todos los datos de la ejecución
+(descargas, almacén, resumen) se escriben en una carpeta de trabajo y las
+cachés y el estado histórico se desactivan, para medir siempre el trabajo
+completo.
+
+Los resultados se comparan con baselines.json: una fase es una regresión si
+supera a su línea base en más de 'threshold' (proporción).
+
+Uso:
+    python -m benchmarks.suite --scenario small
+    python -m benchmarks.suite --scenario medium --repeat 5 --save-baseline
+    python -m benchmarks.suite --files 2 --rows 50000 --width 60
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import argparse
+import tempfile
+from datetime import datetime
+
+from benchmarks import project_root
+from benchmarks.generator import generate_dataset
+from config_loader import config
+from metrics import peak_rss_mb
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+# Escenarios predefinidos: archivos, filas por archivo y columnas de la hoja
+SCENARIOS = {
+    'small': {'files': 2, 'rows': 2000, 'width': 0},
+    'medium': {'files': 4, 'rows': 20000, 'width': 30},
+    'large': {'files': 8, 'rows': 100000, 'width': 30},
+    'wide': {'files': 2, 'rows': 10000, 'width': 120}
+}
+
+STAGES = ('extract', 'transform', 'load', 'end_to_end')
+
+# Umbral de regresión por defecto y tiempo mínimo comparable (por debajo es ruido)
+DEFAULT_THRESHOLD = 0.25
+MIN_SECONDS = 0.05
+
+
+def isolate_config(work_dir, sinks=None):
+    """
+    Redirige las rutas de datos a la carpeta de trabajo y desactiva las
+    cachés, el estado histórico y la omisión de fuentes sin cambios.
+    """
+    for key, path in config.paths.items():
+        if key in ('project_root', 'sql_connection_dir'):
+            continue
+        config.paths[key] = os.path.join(work_dir, os.path.relpath(path, project_root))
+    config.cache['parsed']['enabled'] = False
+    config.cache['partitions']['enabled'] = False
+    config.load['state']['enabled'] = False
+    config.download['skip_unchanged'] = False
+    if sinks:
+        config.load['sinks']['enabled'] = list(sinks)
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def run_once(paths):
+    """
+    Ejecuta una repetición de cada medición.
+
+    Returns:
+        dict: fase -> segundos, más las filas leídas y consolidadas
+    """
+    # Importación diferida: las fases se importan después de isolate_config
+    from extract.extract import ExcelDownloader
+    from transform.transform import ExcelProcessor
+    from load.load import ExcelWriter
+
+    timings = {}
+    downloader = ExcelDownloader(config.paths['data_dir'])
+    extracted = []
+    timings['extract'] = 0.0
+    for unique_id, path in enumerate(paths, start=1):
+        elapsed, data = _timed(downloader.extract_data, path, unique_id)
+        timings['extract'] += elapsed
+        if not data:
+            raise RuntimeError(f"No se pudo extraer {path}")
+        extracted.append(data)
+
+    processor = ExcelProcessor()
+    timings['transform'], transformed = _timed(processor.process_files, extracted)
+
+    writer = ExcelWriter(config.paths['summary_dir'])
+    timings['load'], success = _timed(writer.update_consolidated, transformed)
+    if not success:
+        raise RuntimeError("La carga del consolidado falló")
+
+    def end_to_end():
+        e2e_downloader = ExcelDownloader(config.paths['data_dir'])
+        e2e_transformed = ExcelProcessor().process_files(e2e_downloader.process_urls(paths))
+        return ExcelWriter(config.paths['summary_dir']).update_consolidated(e2e_transformed)
+
+    timings['end_to_end'], success = _timed(end_to_end)
+    if not success:
+        raise RuntimeError("La ejecución de punta a punta falló")
+
+    timings['rows'] = sum(len(data['dataframe']) for data in extracted)
+    return timings
+
+
+def run_benchmark(params, repeat=3, sinks=None, work_dir=None):
+    """
+    Genera (o reutiliza) los libros del escenario y ejecuta las mediciones.
+
+    Returns:
+        dict: {'timings': fase -> mínimo en segundos, 'runs': todas las
+        repeticiones, 'rows', 'peak_rss_mb'}
+    """
+    work_dir = work_dir or tempfile.mkdtemp(prefix='oinap_bench_')
+    paths = generate_dataset(os.path.join(work_dir, 'workbooks'), params['files'], params['rows'], params['width'])
+    isolate_config(os.path.join(work_dir, 'run'), sinks)
+
+    runs = []
+    for _ in range(repeat):
+        # Cada repetición parte de una carpeta de datos vacía
+        shutil.rmtree(os.path.join(work_dir, 'run'), ignore_errors=True)
+        runs.append(run_once(paths))
+
+    return {
+        'timings': {stage: round(min(run[stage] for run in runs), 4) for stage in STAGES},
+        'runs': [{stage: round(run[stage], 4) for stage in STAGES} for run in runs],
+        'rows': runs[0]['rows'],
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def load_baselines(path=BASELINES_PATH):
+    if not os.path.exists(path):
+        return {'threshold': DEFAULT_THRESHOLD, 'scenarios': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(name, params, result, path=BASELINES_PATH):
+    """Guarda el resultado como línea base del escenario"""
+    baselines = load_baselines(path)
+    baselines['scenarios'][name] = {
+        'params': params,
+        'timings': result['timings'],
+        'rows': result['rows'],
+        'recorded': datetime.now().isoformat(timespec='seconds'),
+        'machine': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count()
+        }
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baselines, f, ensure_ascii=False, indent=4)
+        f.write('\n')
+
+
+def compare(result, baseline, threshold):
+    """
+    Compara los tiempos con la línea base.
+
+    Returns:
+        list: Tuplas (fase, línea base, actual, variación, es_regresión)
+    """
+    rows = []
+    for stage in STAGES:
+        current = result['timings'][stage]
+        base = baseline['timings'].get(stage)
+        if base is None:
+            continue
+        change = (current - base) / base if base > 0 else 0.0
+        regression = change > threshold and max(current, base) >= MIN_SECONDS
+        rows.append((stage, base, current, change, regression))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de extracción, transformación y carga")
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='small', help="Escenario predefinido")
+    parser.add_argument('--files', type=int, help="Reemplaza la cantidad de archivos del escenario")
+    parser.add_argument('--rows', type=int, help="Reemplaza las filas por archivo del escenario")
+    parser.add_argument('--width', type=int, help="Reemplaza las columnas de la hoja del escenario")
+    parser.add_argument('--repeat', type=int, default=3, help="Repeticiones de cada medición")
+    parser.add_argument('--sinks', help="Destinos de salida separados por coma (por defecto, los de config.json)")
+    parser.add_argument('--work-dir', help="Carpeta de trabajo (permite reutilizar los libros generados)")
+    parser.add_argument('--threshold', type=float, help="Umbral de regresión (por defecto, el de baselines.json)")
+    parser.add_argument('--save-baseline', action='store_true', help="Guarda el resultado como línea base")
+    parser.add_argument('--verbose', action='store_true', help="Muestra los logs del proceso ETL")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format=config.logging['format'])
+
+    params = dict(SCENARIOS[args.scenario])
+    for key in ('files', 'rows', 'width'):
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+    # Un escenario con parámetros modificados no se compara con la línea base del predefinido
+    name = args.scenario if params == SCENARIOS[args.scenario] else \
+        f"custom_{params['files']}f_{params['rows']}r_{params['width']}c"
+
+    sinks = args.sinks.split(',') if args.sinks else None
+    print(f"Escenario {name}: {params['files']} archivos x {params['rows']} filas, "
+          f"{params['width'] or 'mínimo de'} columnas, {args.repeat} repeticiones")
+    result = run_benchmark(params, args.repeat, sinks, args.work_dir)
+
+    rows = result['rows']
+    print(f"{'fase':<12} {'mínimo s':>10} {'filas/s':>12}")
+    for stage in STAGES:
+        seconds = result['timings'][stage]
+        print(f"{stage:<12} {seconds:>10.3f} {rows / seconds if seconds else 0:>12.0f}")
+    print(f"{rows} filas leídas, RSS máximo {result['peak_rss_mb']} MB")
+
+    baselines = load_baselines()
+    threshold = args.threshold if args.threshold is not None else baselines.get('threshold', DEFAULT_THRESHOLD)
+    exit_code = 0
+    baseline = baselines['scenarios'].get(name)
+    if baseline:
+        print(f"\nComparación con la línea base del {baseline['recorded']} (umbral {threshold:.0%}):")
+        for stage, base, current, change, regression in compare(result, baseline, threshold):
+            print(f"  {stage:<12} {base:>8.3f} -> {current:>8.3f} ({change:+.0%}){'  REGRESIÓN' if regression else ''}")
+            if regression:
+                exit_code = 1
+    else:
+        print(f"\nNo hay línea base para el escenario {name}")
+
+    if args.save_baseline:
+        save_baseline(name, params, result)
+        print(f"Línea base de {name} guardada en {BASELINES_PATH}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+Puntos de control de la ejecución
+Este módulo guarda en la carpeta de cada ejecución
+(data/downloads/execution_<timestamp>/checkpoints) el resultado de cada
+fase apenas termina:
+- download: archivos descargados, en orden, y el manifiesto de la ejecución
+- extract: un lote por archivo extraído (filial + filas), guardado al
+  terminar cada archivo
+- transform: el lote consolidado que recibe la carga
+- load: marca de carga completada
+En modo pipeline la extracción no tiene punto de control propio: se
+registran la descarga y la transformación al terminar el pipeline.
+
+Si la ejecución falla (por ejemplo, en ExcelWriter.update_consolidated),
+'python src/cli.py run --resume <execution_id>' la retoma desde la primera
+fase incompleta: reintentar una carga fallida solo lee el lote
+transformado, sin descargar ni leer los Excel otra vez.
+
+Los lotes usan el mismo formato que la caché de lectura (Parquet, o pickle
+si pyarrow no está instalado). Configuración ('checkpoints'): enabled, format.
+"""
+
+import os
+import glob
+import json
+import logging
+from datetime import datetime
+
+from config_loader import config
+from extract.parsed_cache import read_frame, write_frame
+
+# Fases con punto de control, en orden de ejecución
+PHASES = ('download', 'extract', 'transform', 'load')
+
+
+def execution_folder(execution_id):
+    """
+    Carpeta de descargas de una ejecución. Acepta el identificador completo
+    ('execution_20250223_005606') o solo su timestamp.
+    """
+    execution_id = os.path.basename(str(execution_id).rstrip('/\\'))
+    if not execution_id.startswith('execution_'):
+        execution_id = f"execution_{execution_id}"
+    return os.path.join(config.data_dir, "downloads", execution_id)
+
+
+class CheckpointStore:
+    """
+    Puntos de control de una ejecución, con un índice JSON
+    fase -> {completed, datos de la fase} y los lotes extraídos por archivo.
+    """
+
+    STATE_NAME = 'checkpoints.json'
+    TRANSFORMED_NAME = 'transform'
+
+    def __init__(self, execution_folder):
+        settings = config.checkpoints
+        self.enabled = settings['enabled']
+        self.use_parquet = settings['format'] == 'parquet'
+        self.execution_folder = execution_folder
+        self.checkpoints_dir = os.path.join(execution_folder, 'checkpoints')
+        self.state_path = os.path.join(self.checkpoints_dir, self.STATE_NAME)
+        self.state = self._load()
+
+    def _load(self):
+        """Carga el índice de la ejecución (vacío si todavía no hay puntos de control)"""
+        state = {'phases': {}, 'extracted': {}}
+        if not self.enabled or not os.path.exists(self.state_path):
+            return state
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state.update(json.load(f))
+        except Exception as e:
+            logging.warning(f"No se pudo leer el índice de puntos de control {self.state_path}: {e}")
+        return state
+
+    def _save(self):
+        """Guarda el índice de forma atómica"""
+        if not os.path.exists(self.checkpoints_dir):
+            os.makedirs(self.checkpoints_dir, exist_ok=True)
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def exists(self):
+        """Indica si la ejecución tiene algún punto de control guardado"""
+        return bool(self.state['phases'] or self.state['extracted'])
+
+    def completed(self, phase):
+        return 'completed' in self.state['phases'].get(phase, {})
+
+    def first_incomplete(self):
+        """
+        Primera fase sin completar, o None si la ejecución terminó. Las fases
+        anteriores a una fase completada se consideran completas aunque no
+        tengan punto de control propio (p. ej. en modo pipeline la extracción
+        no se guarda por separado).
+        """
+        done = [index for index, phase in enumerate(PHASES) if self.completed(phase)]
+        start = done[-1] + 1 if done else 0
+        return PHASES[start] if start < len(PHASES) else None
+
+    def complete(self, phase, **data):
+        """Marca la fase como completada junto con los datos necesarios para reanudar"""
+        if not self.enabled:
+            return
+        try:
+            self.state['phases'][phase] = dict(data, completed=datetime.now().isoformat(timespec='seconds'))
+            self._save()
+        except Exception as e:
+            logging.warning(f"No se pudo guardar el punto de control de la fase {phase}: {e}")
+
+    def save_download(self, downloaded_files, manifest):
+        """
+        Guarda los archivos descargados (unique_id y ruta relativa a la
+        carpeta de la ejecución) y las entradas del manifiesto.
+        """
+        files = [[unique_id, os.path.relpath(path, self.execution_folder)] for unique_id, path in downloaded_files]
+        entries = [manifest[unique_id] for unique_id in sorted(manifest)]
+        self.complete('download', files=files, manifest=entries)
+
+    def restore_download(self, downloader):
+        """
+        Restaura el manifiesto de la descarga guardada en el descargador.
+        Los archivos que ya se renombraron según su filial
+        ('archivo_<filial>_<id>_<timestamp>.xlsx') se buscan por su unique_id.
+
+        Returns:
+            list: Pares (unique_id, ruta) de los archivos a procesar, en orden
+        """
+        checkpoint = self.state['phases']['download']
+        downloader.manifest = {entry['unique_id']: dict(entry) for entry in checkpoint.get('manifest', [])}
+
+        downloaded_files = []
+        for unique_id, name in checkpoint['files']:
+            path = os.path.join(self.execution_folder, name)
+            if not os.path.exists(path):
+                renamed = sorted(glob.glob(os.path.join(self.execution_folder, f"archivo_*_{unique_id}_*.xlsx")))
+                if renamed:
+                    path = renamed[-1]
+                    if unique_id in downloader.manifest:
+                        downloader.manifest[unique_id]['file'] = os.path.basename(path)
+            downloaded_files.append((unique_id, path))
+        return downloaded_files
+
+    def save_extracted(self, unique_id, data):
+        """Guarda el lote extraído de un archivo"""
+        if not self.enabled:
+            return
+        try:
+            if not os.path.exists(self.checkpoints_dir):
+                os.makedirs(self.checkpoints_dir, exist_ok=True)
+            base_path = os.path.join(self.checkpoints_dir, f"extract_{unique_id:03d}")
+            path = write_frame(base_path, data['filial'], data['dataframe'], self.use_parquet)
+            self.state['extracted'][str(unique_id)] = {
+                'artifact': os.path.basename(path),
+                'file': data.get('file'),
+                'sha256': data.get('sha256'),
+                'source': data.get('source'),
+                'transformed': bool(data.get('transformed')),
+                'excluded': data.get('excluded') or {}
+            }
+            self._save()
+        except Exception as e:
+            logging.warning(f"No se pudo guardar el punto de control del archivo {unique_id}: {e}")
+
+    def load_extracted(self, unique_id):
+        """
+        Lote extraído de un archivo guardado por una ejecución anterior.
+
+        Returns:
+            dict: Mismo formato que ExcelDownloader.extract_data, o None
+        """
+        entry = self.state['extracted'].get(str(unique_id))
+        if not self.enabled or not entry:
+            return None
+        try:
+            loaded = read_frame(os.path.join(self.checkpoints_dir, f"extract_{unique_id:03d}"))
+        except Exception as e:
+            logging.warning(f"No se pudo leer el punto de control del archivo {unique_id}: {e}")
+            return None
+        if not loaded:
+            return None
+        data = dict(loaded[1], sha256=entry['sha256'], source=entry.get('source'), file=entry['file'],
+                    excluded=entry.get('excluded', {}))
+        if entry['transformed']:
+            data['transformed'] = True
+        return data
+
+    def save_transformed(self, transformed_data):
+        """Guarda el lote transformado que recibe la carga"""
+        if not self.enabled or not transformed_data or 'dataframe' not in transformed_data:
+            return
+        try:
+            if not os.path.exists(self.checkpoints_dir):
+                os.makedirs(self.checkpoints_dir, exist_ok=True)
+            base_path = os.path.join(self.checkpoints_dir, self.TRANSFORMED_NAME)
+            path = write_frame(base_path, '', transformed_data['dataframe'], self.use_parquet)
+        except Exception as e:
+            logging.warning(f"No se pudo guardar el punto de control de la transformación: {e}")
+            return
+        self.complete('transform', artifact=os.path.basename(path),
+                      filiales=transformed_data['filiales'], sources=transformed_data['sources'],
+                      origins=transformed_data.get('origins', {}),
+                      rows=len(transformed_data['dataframe']))
+
+    def load_transformed(self):
+        """
+        Lote transformado guardado por una ejecución anterior.
+
+        Returns:
+            dict: Mismo formato que ExcelProcessor.process_files, o None si
+            la fase no se completó o el lote no se puede leer
+        """
+        if not self.enabled or not self.completed('transform'):
+            return None
+        checkpoint = self.state['phases']['transform']
+        try:
+            loaded = read_frame(os.path.join(self.checkpoints_dir, self.TRANSFORMED_NAME))
+        except Exception as e:
+            logging.warning(f"No se pudo leer el punto de control de la transformación: {e}")
+            return None
+        if not loaded:
+            return None
+        return {
+            'filiales': checkpoint['filiales'],
+            'dataframe': loaded[1]['dataframe'],
+            'sources': checkpoint['sources'],
+            'origins': checkpoint.get('origins', {})
+        }
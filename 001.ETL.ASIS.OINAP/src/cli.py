@@ -0,0 +1,269 @@
+"""
+Punto de entrada de línea de comandos del proceso ETL OINAP.
+
+Subcomandos:
+- run: ejecuta el proceso ETL completo (igual que main.py), o retoma una
+  ejecución fallida desde su primera fase incompleta (--resume)
+- validate-config: valida config.json y muestra la estructura de columnas
+- list-sources: lista las fuentes de 'excel_urls' ya expandidas
+- importtime: desglose del tiempo de importación de cada fase
+  (python -X importtime) y tiempo de arranque de los subcomandos triviales
+- compare-runs: compara las métricas de las últimas ejecuciones (metrics.py)
+
+Este módulo solo importa la biblioteca estándar. Las bibliotecas pesadas
+(pandas, openpyxl, requests, pyarrow) se cargan dentro de la fase que las
+usa, de modo que validate-config y list-sources arrancan en menos de
+STARTUP_BUDGET_MS milisegundos.
+
+Uso:
+    python src/cli.py run [--mode serial|process|pipeline] [--resume <execution_id>]
+    python src/cli.py validate-config
+    python src/cli.py list-sources
+    python src/cli.py importtime [fases...] [--top 10] [--depth 1]
+    python src/cli.py compare-runs [-n 5] [--threshold 0.2]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Límite de arranque (ms) para los subcomandos triviales
+STARTUP_BUDGET_MS = 100
+
+# Módulo de entrada de cada fase, medido con -X importtime
+STAGE_MODULES = {
+    'cli': 'cli',
+    'config': 'config_loader',
+    'extract': 'extract.extract',
+    'transform': 'transform.transform',
+    'load': 'load.load',
+    'run': 'main'
+}
+
+# Subcomandos que deben respetar STARTUP_BUDGET_MS
+TRIVIAL_COMMANDS = ('validate-config', 'list-sources')
+
+src_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def cmd_run(args):
+    """Ejecuta el proceso ETL completo"""
+    from config_loader import config
+    if args.mode:
+        # El modo de la línea de comandos reemplaza al de config.json
+        config.pipeline['enabled'] = args.mode == 'pipeline'
+        if args.mode != 'pipeline':
+            config.processing['mode'] = args.mode
+
+    from main import main
+    main(resume=args.resume)
+    return 0
+
+
+def cmd_validate_config(args):
+    """Valida config.json y muestra las columnas precalculadas"""
+    from config_loader import Config
+    try:
+        loaded = Config()
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    spec = loaded.excel_spec
+    print(f"Configuración válida: {os.path.join(loaded.project_root, 'config.json')}")
+    print(f"Pestaña '{spec.sheet_name}', filial en {spec.filial_cell}, encabezados en la fila {spec.header_row}")
+    for column in spec.columns:
+        print(f"  {column.letter:>3} ({column.index:>2})  {column.field:<14} <- '{column.expected_name}'"
+              f"{'  [' + column.dtype + ']' if column.dtype else ''}")
+    mode = 'pipeline' if loaded.pipeline['enabled'] else loaded.processing['mode']
+    print(f"Fuentes: {len(loaded.excel_urls)} | modo: {mode} | destinos: {', '.join(loaded.load['sinks']['enabled'])}")
+    return 0
+
+
+def cmd_list_sources(args):
+    """Lista las fuentes configuradas con el último hash conocido de cada una"""
+    from config_loader import config
+    from extract.sources import describe_sources
+    from extract.download_index import DownloadIndex
+
+    index = DownloadIndex(config.paths['download_index'])
+    sources = describe_sources(config.excel_urls, config.paths['project_root'])
+    for kind, source in sources:
+        entry = index.get(source)
+        sha256 = entry['sha256'][:12] if entry and entry.get('sha256') else '-'
+        print(f"{kind:<8} {sha256:<12} {source}")
+    print(f"{len(sources)} fuentes")
+    return 0
+
+
+def _importtime(module):
+    """
+    Importa el módulo en un intérprete nuevo con -X importtime.
+
+    Returns:
+        list: Tuplas (profundidad, nombre, propio_us, acumulado_us) en el
+        orden en que las reporta el intérprete
+    """
+    import subprocess
+
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=src_dir, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {module}: {completed.stderr.strip().splitlines()[-1]}")
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def _startup_ms(arguments, repeat=3):
+    """Mejor tiempo total (ms) de un proceso nuevo del intérprete con esos argumentos"""
+    import subprocess
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, cwd=src_dir, capture_output=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def cmd_importtime(args):
+    """Reporta el tiempo de importación de cada fase y el arranque de los subcomandos"""
+    stages = args.stages or list(STAGE_MODULES)
+    exceeded = False
+
+    print("Tiempo de importación por fase (python -X importtime):")
+    breakdowns = []
+    for stage in stages:
+        module = STAGE_MODULES.get(stage, stage)
+        entries = _importtime(module)
+        total_us = next((cumulative for depth, name, _, cumulative in entries
+                         if depth == 0 and name == module), 0)
+        print(f"  {stage:<10} {module:<22} {total_us / 1000:>8.1f} ms")
+        breakdowns.append((module, entries))
+
+    print(f"\nArranque de subcomandos triviales (límite {STARTUP_BUDGET_MS} ms):")
+    print(f"  {'(intérprete)':<16} {_startup_ms(['-c', 'pass']):>8.1f} ms")
+    for command in TRIVIAL_COMMANDS:
+        elapsed = _startup_ms([os.path.abspath(__file__), command])
+        over = elapsed > STARTUP_BUDGET_MS
+        exceeded = exceeded or over
+        print(f"  {command:<16} {elapsed:>8.1f} ms{'  EXCEDE EL LÍMITE' if over else ''}")
+
+    for module, entries in breakdowns:
+        # Solo el subárbol del módulo de la fase (hasta --depth niveles). El
+        # intérprete reporta cada módulo después de sus importaciones, así que
+        # el subárbol son las líneas anteriores hasta la raíz previa.
+        nested = []
+        for depth, name, self_us, cumulative_us in entries:
+            if depth == 0:
+                if name == module:
+                    break
+                nested = []
+            elif depth <= args.depth:
+                nested.append((depth, name, self_us, cumulative_us))
+        if not nested:
+            continue
+        print(f"\nDesglose de {module} ({args.top} más costosos):")
+        print(f"  {'propio ms':>10} {'acum. ms':>10}  módulo")
+        for depth, name, self_us, cumulative_us in sorted(nested, key=lambda entry: -entry[3])[:args.top]:
+            print(f"  {self_us / 1000:>10.1f} {cumulative_us / 1000:>10.1f}  {'  ' * (depth - 1)}{name}")
+    return 1 if exceeded else 0
+
+
+def cmd_compare_runs(args):
+    """
+    Muestra las métricas de las últimas ejecuciones y señala las regresiones
+    de la más reciente respecto de la mediana de las anteriores.
+    """
+    from config_loader import config
+    from metrics import load_history, find_regressions
+
+    history_path = os.path.join(config.summary_dir, config.metrics['history_file'])
+    runs = load_history(history_path, args.last)
+    if not runs:
+        print(f"No hay métricas registradas en {history_path}")
+        return 0
+
+    # Columnas: fases en el orden en que aparecen en las ejecuciones
+    phases = []
+    for run in runs:
+        phases.extend(phase for phase in run.get('phases', {}) if phase not in phases)
+
+    header = f"{'ejecución':<26} {'estado':<11} {'total s':>8}"
+    header += ''.join(f" {phase[:17]:>17}" for phase in phases)
+    header += f" {'RSS MB':>8} {'filas':>8} {'KB desc.':>9}  aciertos de caché"
+    print(header)
+    for run in runs:
+        line = f"{run['execution_id']:<26} {run['status']:<11} {run['wall_s']:>8.2f}"
+        for phase in phases:
+            wall = run.get('phases', {}).get(phase, {}).get('wall_s')
+            line += f" {wall:>17.2f}" if wall is not None else f" {'-':>17}"
+        rss = run.get('peak_rss_mb')
+        rows = run.get('rows', {}).get('load', {}).get('out')
+        line += f" {rss:>8.1f}" if rss is not None else f" {'-':>8}"
+        line += f" {rows:>8}" if rows is not None else f" {'-':>8}"
+        line += f" {run.get('bytes_downloaded', 0) / 1024:>9.1f}  "
+        line += ', '.join(f"{cache} {values['hit_rate']:.0%}" for cache, values in run.get('caches', {}).items())
+        print(line)
+
+    regressions = find_regressions(runs, args.threshold)
+    if regressions:
+        print(f"\nRegresiones de {runs[-1]['execution_id']} (más de {args.threshold:.0%} sobre la mediana anterior):")
+        for name, baseline, current in regressions:
+            print(f"  {name:<28} {baseline:>10.2f} -> {current:>10.2f} ({(current - baseline) / baseline:+.0%})")
+        return 1
+    if len(runs) > 1:
+        print(f"\nSin regresiones de más de {args.threshold:.0%} en {runs[-1]['execution_id']}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Proceso ETL de asistencias OINAP")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Ejecuta el proceso ETL completo")
+    run_parser.add_argument('--mode', choices=['serial', 'process', 'pipeline'],
+                            help="Reemplaza el modo de procesamiento de config.json")
+    run_parser.add_argument('--resume', metavar='EXECUTION_ID',
+                            help="Retoma la ejecución indicada (execution_<timestamp>) desde su primera fase incompleta")
+    run_parser.set_defaults(handler=cmd_run)
+
+    validate_parser = subparsers.add_parser('validate-config', help="Valida config.json")
+    validate_parser.set_defaults(handler=cmd_validate_config)
+
+    sources_parser = subparsers.add_parser('list-sources', help="Lista las fuentes configuradas")
+    sources_parser.set_defaults(handler=cmd_list_sources)
+
+    importtime_parser = subparsers.add_parser('importtime', help="Desglose del tiempo de importación")
+    importtime_parser.add_argument('stages', nargs='*',
+                                   help=f"Fases o módulos a medir (por defecto: {', '.join(STAGE_MODULES)})")
+    importtime_parser.add_argument('--top', type=int, default=10, help="Módulos a mostrar por fase")
+    importtime_parser.add_argument('--depth', type=int, default=1, help="Niveles de importación a mostrar")
+    importtime_parser.set_defaults(handler=cmd_importtime)
+
+    compare_parser = subparsers.add_parser('compare-runs', help="Compara las métricas de las últimas ejecuciones")
+    compare_parser.add_argument('-n', '--last', type=int, default=5, help="Cantidad de ejecuciones a comparar")
+    compare_parser.add_argument('--threshold', type=float, default=0.2,
+                                help="Aumento relativo que se considera regresión (0.2 = 20%%)")
+    compare_parser.set_defaults(handler=cmd_compare_runs)
+    return parser
+
+
+def cli(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
@@ -1,12 +1,281 @@
 import os
+import re
 import json
-import logging
+from dataclasses import dataclass
+
+# Tipos de columna admitidos en 'excel.structure.columns.<campo>.dtype'
+COLUMN_DTYPES = ('category', 'date')
+
+# Niveles admitidos en 'logging.level' (sin importar logging al cargar la configuración)
+LOG_LEVELS = ('CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG', 'NOTSET')
+
+# Nombres admitidos por las secciones que recién se usan en la transformación
+# y la carga. Sus implementaciones (transform/rules.py, load/attendance.py,
+# load/sinks.py) importan pandas, así que aquí solo se declaran los nombres
+# para validar la configuración antes de cualquier descarga.
+PROCESSING_MODES = ('serial', 'process')
+# Operador de filtro -> clave con el valor que compara (None: no usa valor)
+FILTER_OPS = {'in': 'values', 'not_in': 'values', 'eq': 'value', 'ne': 'value', 'not_null': None, 'null': None}
+# Operador de columna derivada -> clave obligatoria
+DERIVED_OPS = {'constant': 'value', 'copy': 'field', 'concat': 'fields', 'year': 'field', 'month': 'field'}
+ATTENDANCE_AGGREGATIONS = ('sum', 'max')
+SINK_NAMES = ('xlsx', 'parquet', 'csv', 'sqlite', 'database')
+
+_CELL_PATTERN = re.compile(r'^([A-Z]{1,3})([1-9][0-9]*)$')
+_COLUMN_PATTERN = re.compile(r'^[A-Z]{1,3}$')
+
+
+class ConfigError(Exception):
+    """Error de estructura o de valores en config.json"""
+
+
+def column_index(letter):
+    """Número de columna (1 = A) a partir de su letra, sin depender de openpyxl"""
+    index = 0
+    for char in letter:
+        index = index * 26 + ord(char) - ord('A') + 1
+    return index
+
+
+@dataclass(frozen=True, slots=True)
+class ColumnSpec:
+    """Columna configurada del Excel, con su posición ya calculada"""
+    field: str            # Nombre del campo ('mes', 'grupo', ...)
+    letter: str           # Letra de la columna en el Excel ('C')
+    index: int            # Número de la columna (1 = A)
+    expected_name: str    # Encabezado esperado en la fila de encabezados
+    dtype: str | None     # "category" | "date" | None
+
+
+@dataclass(frozen=True, slots=True)
+class ExcelSpec:
+    """
+    Estructura del Excel precalculada a partir de 'excel.structure'.
+    Se construye una sola vez al cargar la configuración para que las
+    rutas calientes (lectura, validación, transformación, esquema) lean
+    atributos en lugar de recorrer diccionarios anidados.
+    """
+    sheet_name: str
+    filial_cell: str
+    filial_letter: str
+    filial_index: int
+    filial_row: int
+    header_row: int
+    columns: tuple        # Tupla de ColumnSpec en el orden de config.json
+    fields: tuple         # Nombres de campo en el mismo orden
+    rename_map: tuple     # Pares (expected_name, field)
+    min_col: int          # Rango de columnas a recorrer (columnas + celda de filial)
+    max_col: int
+
+    def column(self, field):
+        """ColumnSpec de un campo"""
+        for spec in self.columns:
+            if spec.field == field:
+                return spec
+        raise KeyError(field)
+
+
+def build_excel_spec(structure):
+    """Construye la ExcelSpec a partir de la sección 'excel.structure' ya validada"""
+    filial_letter, filial_row = _CELL_PATTERN.match(structure['filial_cell']).groups()
+    columns = tuple(
+        ColumnSpec(
+            field=field,
+            letter=field_config['column'],
+            index=column_index(field_config['column']),
+            expected_name=field_config['expected_name'],
+            dtype=field_config.get('dtype')
+        )
+        for field, field_config in structure['columns'].items()
+    )
+    filial_index = column_index(filial_letter)
+    indexes = [spec.index for spec in columns] + [filial_index]
+    return ExcelSpec(
+        sheet_name=structure['sheet_name'],
+        filial_cell=structure['filial_cell'],
+        filial_letter=filial_letter,
+        filial_index=filial_index,
+        filial_row=int(filial_row),
+        header_row=structure['header_row'],
+        columns=columns,
+        fields=tuple(spec.field for spec in columns),
+        rename_map=tuple((spec.expected_name, spec.field) for spec in columns),
+        min_col=min(indexes),
+        max_col=max(indexes)
+    )
+
+
+def validate_config(config_data):
+    """
+    Valida la estructura de config.json.
+
+    Returns:
+        list: Mensajes con los errores encontrados (vacía si es válida)
+    """
+    errors = []
+
+    def require(section, key, expected_type, path):
+        if not isinstance(section, dict) or key not in section:
+            errors.append(f"Falta la clave '{path}'")
+            return None
+        value = section[key]
+        if not isinstance(value, expected_type) or isinstance(value, bool) and expected_type is not bool:
+            errors.append(f"'{path}' tiene un tipo inválido ({type(value).__name__})")
+            return None
+        return value
+
+    paths = require(config_data, 'paths', dict, 'paths')
+    for key, path in (paths or {}).items():
+        if not isinstance(path, str):
+            errors.append(f"'paths.{key}' debe ser una ruta")
+
+    urls = require(config_data, 'excel_urls', list, 'excel_urls')
+    for position, url in enumerate(urls or []):
+        if isinstance(url, dict):
+            # Servidor de prueba local (ver extract/sources.py)
+            if url.get('type') != 'fixture' or not isinstance(url.get('directory'), str):
+                errors.append(f"'excel_urls[{position}]' no es una fuente de tipo 'fixture' válida")
+        elif not isinstance(url, str) or not url:
+            errors.append(f"'excel_urls[{position}]' debe ser una URL o ruta no vacía")
+
+    excel = require(config_data, 'excel', dict, 'excel')
+    structure = require(excel, 'structure', dict, 'excel.structure') if excel else None
+    fields = set()
+    if structure:
+        require(structure, 'sheet_name', str, 'excel.structure.sheet_name')
+        filial_cell = require(structure, 'filial_cell', str, 'excel.structure.filial_cell')
+        if filial_cell and not _CELL_PATTERN.match(filial_cell):
+            errors.append(f"'excel.structure.filial_cell' no es una celda válida: {filial_cell}")
+        header_row = require(structure, 'header_row', int, 'excel.structure.header_row')
+        if header_row is not None and header_row < 1:
+            errors.append("'excel.structure.header_row' debe ser mayor o igual a 1")
+        columns = require(structure, 'columns', dict, 'excel.structure.columns')
+        if columns is not None and not columns:
+            errors.append("'excel.structure.columns' no define ninguna columna")
+        for field, field_config in (columns or {}).items():
+            path = f'excel.structure.columns.{field}'
+            fields.add(field)
+            letter = require(field_config, 'column', str, f'{path}.column')
+            if letter and not _COLUMN_PATTERN.match(letter):
+                errors.append(f"'{path}.column' no es una letra de columna válida: {letter}")
+            require(field_config, 'expected_name', str, f'{path}.expected_name')
+            dtype = field_config.get('dtype') if isinstance(field_config, dict) else None
+            if dtype is not None and dtype not in COLUMN_DTYPES:
+                errors.append(f"'{path}.dtype' no soportado: {dtype}")
+        if columns and 'mes' not in columns:
+            errors.append("'excel.structure.columns' debe incluir el campo 'mes' (fin de los datos)")
+
+    errors.extend(_validate_rules(config_data.get('rules', {}), fields))
+
+    mode = config_data.get('processing', {}).get('mode')
+    if mode is not None and mode not in PROCESSING_MODES:
+        errors.append(f"'processing.mode' no soportado: {mode} (admitidos: {', '.join(PROCESSING_MODES)})")
+
+    load = config_data.get('load', {})
+    aggregation = load.get('attendance', {}).get('aggregation')
+    if aggregation is not None and aggregation not in ATTENDANCE_AGGREGATIONS:
+        errors.append(f"'load.attendance.aggregation' no soportada: {aggregation} "
+                      f"(admitidas: {', '.join(ATTENDANCE_AGGREGATIONS)})")
+    sinks = require(load.get('sinks'), 'enabled', list, 'load.sinks.enabled') if 'sinks' in load else None
+    if sinks is not None and not sinks:
+        errors.append("'load.sinks.enabled' no activa ningún destino de salida")
+    for sink in sinks or []:
+        if sink not in SINK_NAMES:
+            errors.append(f"'load.sinks.enabled' incluye un destino no soportado: {sink} "
+                          f"(admitidos: {', '.join(SINK_NAMES)})")
+
+    for section, keys in (('download', ('max_concurrent_downloads', 'max_retries')),
+                          ('processing', ('max_workers',))):
+        for key in keys:
+            value = config_data.get(section, {}).get(key)
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+                errors.append(f"'{section}.{key}' debe ser un entero no negativo")
+
+    level = config_data.get('logging', {}).get('level')
+    if level is not None and level not in LOG_LEVELS:
+        errors.append(f"'logging.level' no es un nivel de logging válido: {level}")
+
+    return errors
+
+
+def _validate_rules(rules, fields):
+    """
+    Valida la sección 'rules' con los mismos requisitos que RuleEngine
+    (transform/rules.py) al compilarla.
+
+    Returns:
+        list: Mensajes con los errores encontrados
+    """
+    if not isinstance(rules, dict):
+        return ["'rules' debe ser un objeto"]
+    errors = []
+    names = set()
+    for section in ('filters', 'mappings', 'derived'):
+        entries = rules.get(section, [])
+        if not isinstance(entries, list):
+            errors.append(f"'rules.{section}' debe ser una lista")
+            continue
+        for position, rule in enumerate(entries):
+            path = f'rules.{section}[{position}]'
+            if not isinstance(rule, dict):
+                errors.append(f"'{path}' debe ser un objeto")
+                continue
+            name = rule.get('name')
+            if not isinstance(name, str) or not name:
+                errors.append(f"'{path}.name' es obligatorio")
+            elif name in names:
+                errors.append(f"'{path}.name' repite el nombre de otra regla: {name}")
+            names.add(name)
+
+            if section == 'filters':
+                op = rule.get('op')
+                if op not in FILTER_OPS:
+                    errors.append(f"'{path}.op' no soportado: {op} (admitidos: {', '.join(FILTER_OPS)})")
+                elif FILTER_OPS[op] == 'values' and not isinstance(rule.get('values'), list):
+                    errors.append(f"'{path}.values' debe ser una lista para el operador '{op}'")
+                elif FILTER_OPS[op] == 'value' and 'value' not in rule:
+                    errors.append(f"'{path}.value' es obligatorio para el operador '{op}'")
+                # Los filtros se evalúan sobre los campos leídos
+                if fields and rule.get('field') not in fields:
+                    errors.append(f"'{path}' usa un campo no configurado: {rule.get('field')}")
+            elif section == 'mappings':
+                if not isinstance(rule.get('field'), str):
+                    errors.append(f"'{path}.field' es obligatorio")
+                if not isinstance(rule.get('values'), dict):
+                    errors.append(f"'{path}.values' debe ser un objeto valor -> reemplazo")
+            else:
+                op = rule.get('op')
+                if not isinstance(rule.get('column'), str):
+                    errors.append(f"'{path}.column' es obligatorio")
+                if op not in DERIVED_OPS:
+                    errors.append(f"'{path}.op' no soportado: {op} (admitidos: {', '.join(DERIVED_OPS)})")
+                elif DERIVED_OPS[op] not in rule:
+                    errors.append(f"'{path}.{DERIVED_OPS[op]}' es obligatorio para el operador '{op}'")
+                elif op == 'concat' and not (isinstance(rule['fields'], list) and rule['fields']):
+                    errors.append(f"'{path}.fields' debe ser una lista no vacía")
+    return errors
+
 
 class Config:
+    """
+    Configuración validada una sola vez al cargarla. La instancia es de solo
+    lectura (con __slots__ y sin asignación de atributos). Las secciones
+    siguen siendo diccionarios (config.<sección>['clave']) y el acceso por
+    atributo (config.data_dir) lee el valor vigente de la sección que lo
+    define, así que los cambios hechos en una sección (cli.py,
+    benchmarks/suite.py) se reflejan en sus atributos.
+    """
+
+    __slots__ = ('project_root', 'config_data', 'excel_spec', '_locations')
+
     def __init__(self):
-        self.project_root = os.path.dirname(os.path.dirname(__file__))
-        self.config_data = self._load_config()
+        initialize = object.__setattr__
+        initialize(self, 'project_root', os.path.dirname(os.path.dirname(__file__)))
+        initialize(self, 'config_data', self._load_config())
         self._setup_paths()
+        self._validate()
+        initialize(self, 'excel_spec', build_excel_spec(self.config_data['excel']['structure']))
+        initialize(self, '_locations', self._build_locations())
 
     def _load_config(self):
         """Carga la configuración desde el archivo JSON"""
@@ -20,22 +289,54 @@ class Config:
         except Exception as e:
             raise Exception(f"Error al cargar la configuración: {e}")
 
+    def _validate(self):
+        """Valida la configuración una sola vez, antes de cualquier descarga"""
+        errors = validate_config(self.config_data)
+        if errors:
+            raise ConfigError("Configuración inválida:\n- " + "\n- ".join(errors))
+
     def _setup_paths(self):
         """Configura las rutas absolutas basadas en el directorio base"""
         # Convertir rutas relativas a absolutas
         for key, path in self.config_data['paths'].items():
-            if key != 'project_root':  # No procesar project_root
+            if key != 'project_root' and isinstance(path, str):  # No procesar project_root
                 self.config_data['paths'][key] = os.path.join(self.project_root, path)
 
+    def _build_locations(self):
+        """
+        Tabla nombre -> sección que lo define (None para las secciones de
+        primer nivel), construida una sola vez. Las secciones de primer nivel
+        tienen prioridad; entre las claves de las secciones gana la primera
+        sección que la define.
+        """
+        locations = {}
+        for section_name, section in self.config_data.items():
+            if isinstance(section, dict):
+                for key in section:
+                    locations.setdefault(key, section_name)
+        locations.update(dict.fromkeys(self.config_data))
+        return locations
+
     def __getattr__(self, name):
-        """Permite acceder a la configuración como atributos"""
-        if name in self.config_data:
-            return self.config_data[name]
-        
-        for section in self.config_data.values():
-            if isinstance(section, dict) and name in section:
-                return section[name]
+        """Permite acceder a la configuración como atributos (valor vigente de su sección)"""
+        if not name.startswith('_') and name in self._locations:
+            section = self._locations[name]
+            if section is None:
+                return self.config_data[name]
+            return self.config_data[section][name]
         raise AttributeError(f"'{type(self).__name__}' no tiene el atributo '{name}'")
 
-# Crear una instancia global de la configuración
-config = Config()
\ No newline at end of file
+    def __setattr__(self, name, value):
+        raise AttributeError(f"La configuración es de solo lectura; modifique la sección que define '{name}'")
+
+def __getattr__(name):
+    """
+    Instancia global de la configuración, creada (y validada) en el primer
+    'from config_loader import config'. Así los subcomandos que no la usan
+    no leen config.json, y validate-config puede reportar sus errores.
+    """
+    if name == 'config':
+        global config
+        config = Config()
+        return config
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
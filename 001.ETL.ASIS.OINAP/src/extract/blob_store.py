@@ -0,0 +1,146 @@
+"""
+Almacén de descargas direccionado por contenido
+Este módulo guarda cada archivo descargado una sola vez, identificado por
+su SHA-256. Las carpetas de ejecución solo contienen enlaces duros hacia el
+almacén (o únicamente un manifiesto) y una política de retención elimina
+las ejecuciones antiguas y los archivos que ya nadie referencia.
+"""
+
+import os
+import json
+import shutil
+import logging
+from datetime import datetime
+
+
+class BlobStore:
+    """
+    Almacén de archivos identificados por SHA-256 con estructura
+    <store_dir>/<2 primeros caracteres>/<sha256>.xlsx
+    """
+
+    MANIFEST_NAME = 'manifest.json'
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        if not os.path.exists(store_dir):
+            os.makedirs(store_dir, exist_ok=True)
+
+    def blob_path(self, sha256):
+        """Ruta del archivo almacenado para un hash"""
+        return os.path.join(self.store_dir, sha256[:2], f"{sha256}.xlsx")
+
+    def add(self, file_path, sha256):
+        """
+        Mueve un archivo al almacén. Si el contenido ya existe, el archivo
+        recibido se descarta.
+
+        Returns:
+            str: Ruta del archivo dentro del almacén
+        """
+        blob_path = self.blob_path(sha256)
+        if os.path.exists(blob_path):
+            os.remove(file_path)
+            return blob_path
+
+        directory = os.path.dirname(blob_path)
+        if not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        os.replace(file_path, blob_path)
+        return blob_path
+
+    def add_copy(self, file_path, sha256):
+        """
+        Copia un archivo local al almacén sin modificar el original.
+
+        Returns:
+            str: Ruta del archivo dentro del almacén
+        """
+        blob_path = self.blob_path(sha256)
+        if os.path.exists(blob_path):
+            return blob_path
+
+        directory = os.path.dirname(blob_path)
+        if not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{blob_path}.{os.getpid()}.tmp"
+        shutil.copy2(file_path, tmp_path)
+        os.replace(tmp_path, blob_path)
+        return blob_path
+
+    @staticmethod
+    def link(blob_path, dest_path):
+        """
+        Crea un enlace duro del archivo almacenado en la carpeta de ejecución.
+        Si el sistema de archivos no lo permite, se copia el archivo.
+        """
+        try:
+            os.link(blob_path, dest_path)
+        except OSError:
+            shutil.copy2(blob_path, dest_path)
+        return dest_path
+
+    def write_manifest(self, execution_folder, entries):
+        """
+        Escribe el manifiesto de la ejecución con los archivos utilizados.
+
+        Args:
+            entries (list): Diccionarios con 'unique_id', 'url', 'sha256' y 'file'
+        """
+        manifest = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'files': entries
+        }
+        manifest_path = os.path.join(execution_folder, self.MANIFEST_NAME)
+        tmp_path = f"{manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, manifest_path)
+
+    def _referenced_hashes(self, downloads_dir, extra_hashes):
+        """Hashes referenciados por algún manifiesto vigente o por el índice de descargas"""
+        referenced = set(extra_hashes)
+        for name in os.listdir(downloads_dir):
+            manifest_path = os.path.join(downloads_dir, name, self.MANIFEST_NAME)
+            if name.startswith('execution_') and os.path.exists(manifest_path):
+                try:
+                    with open(manifest_path, 'r', encoding='utf-8') as f:
+                        manifest = json.load(f)
+                    referenced.update(entry['sha256'] for entry in manifest.get('files', []))
+                except Exception as e:
+                    # Ante un manifiesto ilegible no se elimina nada
+                    logging.warning(f"No se pudo leer el manifiesto {manifest_path}: {e}")
+                    return None
+        return referenced
+
+    def collect_garbage(self, downloads_dir, keep_executions, extra_hashes=()):
+        """
+        Aplica la política de retención:
+        1. Conserva solo las 'keep_executions' carpetas de ejecución más recientes (0 = todas)
+        2. Elimina los archivos del almacén que ninguna ejecución ni el índice referencian
+        """
+        executions = sorted(
+            name for name in os.listdir(downloads_dir)
+            if name.startswith('execution_') and os.path.isdir(os.path.join(downloads_dir, name))
+        )
+        if keep_executions and len(executions) > keep_executions:
+            for name in executions[:-keep_executions]:
+                shutil.rmtree(os.path.join(downloads_dir, name), ignore_errors=True)
+                logging.info(f"Ejecución eliminada por retención: {name}")
+
+        referenced = self._referenced_hashes(downloads_dir, extra_hashes)
+        if referenced is None:
+            return 0
+
+        removed = 0
+        for prefix in os.listdir(self.store_dir):
+            prefix_dir = os.path.join(self.store_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                if name.endswith('.xlsx') and name[:-len('.xlsx')] not in referenced:
+                    os.remove(os.path.join(prefix_dir, name))
+                    removed += 1
+        if removed:
+            logging.info(f"{removed} archivos sin referencias eliminados del almacén de descargas")
+        return removed
@@ -0,0 +1,117 @@
+"""
+Índice persistente de descargas
+Este módulo guarda, para cada URL descargada, los validadores HTTP
+(ETag / Last-Modified), el hash SHA-256 del contenido y la ruta de la
+última copia local. Permite realizar peticiones condicionales y omitir
+archivos que no cambiaron desde la ejecución anterior.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+
+def compute_sha256(file_path, chunk_size=1024 * 1024):
+    """
+    Calcula el hash SHA-256 de un archivo leyéndolo por bloques.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadIndex:
+    """
+    Índice de descargas almacenado como JSON.
+    Es seguro para ser usado desde varios hilos de descarga a la vez.
+    """
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        """Carga el índice desde disco; si no existe o está dañado, inicia vacío"""
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning(f"No se pudo leer el índice de descargas {self.index_path}: {e}")
+            return {}
+
+    def get(self, url):
+        """
+        Retorna la entrada de la URL solo si su copia local todavía existe.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry and entry.get('file') and os.path.exists(entry['file']):
+                return dict(entry)
+            return None
+
+    def update(self, url, file_path, sha256, etag=None, last_modified=None):
+        """Registra (o reemplaza) los validadores y el hash de una URL"""
+        with self._lock:
+            self._entries[url] = {
+                'file': file_path,
+                'sha256': sha256,
+                'etag': etag,
+                'last_modified': last_modified,
+                'updated': datetime.now().isoformat(timespec='seconds')
+            }
+
+    def prune(self, sources):
+        """
+        Elimina las entradas de fuentes que ya no están configuradas o cuya
+        copia en el almacén ya no existe, para que sus hashes dejen de
+        retener archivos en la retención del almacén.
+
+        Args:
+            sources (iterable): Fuentes (URLs o rutas) de la ejecución actual
+
+        Returns:
+            int: Cantidad de entradas eliminadas
+        """
+        sources = set(sources)
+        with self._lock:
+            stale = [
+                source for source, entry in self._entries.items()
+                if source not in sources or not (entry.get('file') and os.path.exists(entry['file']))
+            ]
+            for source in stale:
+                del self._entries[source]
+        if stale:
+            logging.info(f"{len(stale)} entradas obsoletas eliminadas del índice de descargas")
+        return len(stale)
+
+    def removed(self, sources):
+        """
+        Fuentes registradas que ya no están entre las indicadas (quitadas de
+        la configuración desde la última ejecución).
+        """
+        sources = set(sources)
+        with self._lock:
+            return [source for source in self._entries if source not in sources]
+
+    def hashes(self):
+        """Conjunto de hashes SHA-256 registrados (archivos aún en uso)"""
+        with self._lock:
+            return {entry['sha256'] for entry in self._entries.values() if entry.get('sha256')}
+
+    def save(self):
+        """Guarda el índice de forma atómica (archivo temporal + reemplazo)"""
+        with self._lock:
+            directory = os.path.dirname(self.index_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
@@ -8,8 +8,14 @@ Este módulo se encarga de:
 
 import os
 import sys
+import json
+import time
+import shutil
+import zipfile
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+import hashlib
 import logging
 from datetime import datetime
 
@@ -20,6 +26,14 @@ if src_dir not in sys.path:
     sys.path.append(src_dir)
 
 from config_loader import config
+from extract.download_index import DownloadIndex, compute_sha256
+from extract.parsed_cache import ParsedCache
+from schema import apply_schema, source_dtypes
+from extract.blob_store import BlobStore
+from extract.sources import is_http_source, resolve_sources, source_key
+from metrics import metrics
+from transform.partitions import PartitionStore
+from transform.rules import pushdown_exclusions
 import pandas as pd
 from openpyxl import load_workbook
 
@@ -37,53 +51,191 @@ class ExcelValidator:
         - Nombres correctos de las columnas
         """
         try:
+            spec = config.excel_spec
+
             # Validación de la pestaña especificada
-            if config.excel['structure']['sheet_name'] not in wb.sheetnames:
-                raise ValueError(f"La pestaña '{config.excel['structure']['sheet_name']}' no existe en el archivo")
+            if spec.sheet_name not in wb.sheetnames:
+                raise ValueError(f"La pestaña '{spec.sheet_name}' no existe en el archivo")
             
-            ws = wb[config.excel['structure']['sheet_name']]
+            ws = wb[spec.sheet_name]
             
             # Validación de la celda que contiene el nombre de la Filial
-            filial_cell = config.excel['structure']['filial_cell']
-            if not ws[filial_cell].value:
-                raise ValueError(f"La celda de Filial ({filial_cell}) está vacía")
+            if not ws[spec.filial_cell].value:
+                raise ValueError(f"La celda de Filial ({spec.filial_cell}) está vacía")
             
             # Validación de los nombres de todas las columnas requeridas
-            header_row = config.excel['structure']['header_row']
-            for field, field_config in config.excel['structure']['columns'].items():
-                column = field_config['column']
-                expected_name = field_config['expected_name']
-                actual_name = ws[f"{column}{header_row}"].value
+            for column in spec.columns:
+                actual_name = ws[f"{column.letter}{spec.header_row}"].value
                 
-                if actual_name != expected_name:
-                    raise ValueError(f"La columna {column} debería llamarse '{expected_name}' pero se encontró '{actual_name}'")
+                if actual_name != column.expected_name:
+                    raise ValueError(f"La columna {column.letter} debería llamarse '{column.expected_name}' pero se encontró '{actual_name}'")
             
             return True
         except Exception as e:
             logging.error(f"Error de validación en {file_path}: {str(e)}")
             return False
 
+    @staticmethod
+    def validate_values(filial, header_values, file_path, first_column=1):
+        """
+        Valida la misma estructura que validate_structure pero a partir de
+        valores ya leídos (lectura en streaming):
+        - filial: valor de la celda de Filial
+        - header_values: tupla con los valores de la fila de encabezados
+        - first_column: número de la columna del primer valor de la tupla
+        """
+        try:
+            spec = config.excel_spec
+            if not filial:
+                raise ValueError(f"La celda de Filial ({spec.filial_cell}) está vacía")
+
+            for column in spec.columns:
+                index = column.index - first_column
+                actual_name = header_values[index] if index < len(header_values) else None
+
+                if actual_name != column.expected_name:
+                    raise ValueError(f"La columna {column.letter} debería llamarse '{column.expected_name}' pero se encontró '{actual_name}'")
+
+            return True
+        except Exception as e:
+            logging.error(f"Error de validación en {file_path}: {str(e)}")
+            return False
+
+class WorkbookReader:
+    """
+    Lector de una sola pasada para los archivos Excel descargados.
+    Recorre la pestaña configurada en modo read-only (streaming) y, en el
+    mismo recorrido, obtiene la filial, valida los encabezados y extrae las
+    columnas configuradas hasta la primera celda 'mes' vacía.
+
+    La lectura aplica proyección y filtrado en origen: solo se recorre el
+    rango de columnas configurado y las filas excluidas por los filtros de
+    'rules' ('not_in' / 'ne') se descartan antes de construir el DataFrame.
+    """
+    def __init__(self):
+        spec = config.excel_spec
+        self.sheet_name = spec.sheet_name
+        self.header_row = spec.header_row
+        self.filial_row = spec.filial_row
+
+        # Rango mínimo de columnas a recorrer (columnas configuradas + celda de filial)
+        self.min_col = spec.min_col
+        self.max_col = spec.max_col
+
+        # Índices relativos al rango leído y nombres de salida de las columnas configuradas
+        self.filial_index = spec.filial_index - self.min_col
+        self.columns = [(column.index - self.min_col, column.expected_name) for column in spec.columns]
+        self.mes_index = spec.column('mes').index - self.min_col
+
+        # Filtros de exclusión aplicados durante la lectura: [(regla, índice, valores excluidos)]
+        self.exclusions = [
+            (name, spec.column(field).index - self.min_col, values)
+            for name, field, values in pushdown_exclusions()
+        ]
+
+    @staticmethod
+    def _value(row, index):
+        """Retorna el valor de la celda o None si la fila es más corta"""
+        return row[index] if index < len(row) else None
+
+    def read(self, file_path):
+        """
+        Lee el archivo en una sola pasada.
+
+        Returns:
+            dict: {'filial', 'dataframe', 'excluded': filas descartadas en
+            la lectura por cada regla} o None si la estructura no es válida
+        """
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            if self.sheet_name not in wb.sheetnames:
+                logging.error(f"Error de validación en {file_path}: La pestaña '{self.sheet_name}' no existe en el archivo")
+                return None
+
+            ws = wb[self.sheet_name]
+            filial = None
+            header_validated = False
+            records = []
+            excluded = {}
+            rows = ws.iter_rows(min_col=self.min_col, max_col=self.max_col, values_only=True)
+            for row_number, row in enumerate(rows, start=1):
+                if row_number == self.filial_row:
+                    filial = self._value(row, self.filial_index)
+                if row_number == self.header_row:
+                    if not ExcelValidator.validate_values(filial, row, file_path, first_column=self.min_col):
+                        return None
+                    header_validated = True
+                elif row_number > self.header_row:
+                    # Los datos válidos terminan en la primera celda 'mes' vacía
+                    if not self._value(row, self.mes_index):
+                        break
+                    # Cada fila descartada se atribuye al primer filtro que la excluye
+                    for name, index, values in self.exclusions:
+                        if self._value(row, index) in values:
+                            excluded[name] = excluded.get(name, 0) + 1
+                            break
+                    else:
+                        records.append(tuple(self._value(row, index) for index, _ in self.columns))
+
+            if not header_validated:
+                logging.error(f"Error de validación en {file_path}: La fila de encabezados {self.header_row} no existe")
+                return None
+
+            if excluded:
+                total = sum(excluded.values())
+                logging.info(f"{total} filas excluidas durante la lectura de {file_path}")
+                metrics.count('extract.rows_excluded', total)
+            df = pd.DataFrame.from_records(records, columns=[name for _, name in self.columns])
+            apply_schema(df, source_dtypes())
+            return {
+                'filial': filial,
+                'dataframe': df,
+                'excluded': excluded
+            }
+        finally:
+            wb.close()
+
 class ExcelDownloader:
     """
     Clase principal para la descarga y procesamiento inicial de archivos Excel.
     Maneja la descarga desde OneDrive y el almacenamiento local de los archivos.
     """
-    def __init__(self, data_folder):
+    def __init__(self, data_folder, execution_id=None):
         """
         Inicializa el descargador con el directorio base para los archivos
-        y crea la estructura de carpetas necesaria.
+        y crea la estructura de carpetas necesaria. Con 'execution_id' se
+        retoma la carpeta de una ejecución anterior (ver checkpoints.py).
         """
         self.data_folder = data_folder
+        self.execution_id = execution_id
         self.downloads_folder = None
+        self.download_index = DownloadIndex(config.paths['download_index'])
+        self.blob_store = BlobStore(config.paths['store_dir'])
+        self.manifest = {}
+        # Fuentes resueltas de la ejecución (para depurar el índice de descargas)
+        self.sources = None
+        self.unchanged_files = set()
+        self.all_unchanged = False
+        self.reader = WorkbookReader()
+        self.parsed_cache = ParsedCache()
+        self.partitions = PartitionStore()
         self.setup_folders()
     
     def setup_folders(self):
         """
         Crea la estructura de carpetas para almacenar las descargas,
-        usando un timestamp único para cada ejecución.
+        usando un timestamp único para cada ejecución. Una ejecución nueva
+        nunca reutiliza la carpeta (ni los puntos de control) de otra
+        iniciada en el mismo segundo: se agrega un sufijo '_<n>'.
         """
-        timestamp = datetime.now().strftime(config.formats['timestamp'])
-        self.downloads_folder = os.path.join(self.data_folder, "downloads", f"execution_{timestamp}")
+        execution_id = self.execution_id
+        if not execution_id:
+            base_id = f"execution_{datetime.now().strftime(config.formats['timestamp'])}"
+            execution_id, suffix = base_id, 1
+            while os.path.exists(os.path.join(self.data_folder, "downloads", execution_id)):
+                suffix += 1
+                execution_id = f"{base_id}_{suffix}"
+        self.downloads_folder = os.path.join(self.data_folder, "downloads", execution_id)
         if not os.path.exists(self.downloads_folder):
             os.makedirs(self.downloads_folder)
     
@@ -103,126 +255,476 @@ class ExcelDownloader:
             url = urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, new_query, parsed.fragment))
         return url
     
+    def _partial_paths(self, source_url):
+        """
+        Rutas del archivo parcial (.part) y de sus metadatos (.json) para una URL.
+        Son estables entre ejecuciones para poder reanudar la descarga.
+        """
+        partial_dir = config.paths['partial_dir']
+        if not os.path.exists(partial_dir):
+            os.makedirs(partial_dir, exist_ok=True)
+        key = hashlib.sha1(source_url.encode('utf-8')).hexdigest()
+        base_path = os.path.join(partial_dir, key)
+        return f"{base_path}.part", f"{base_path}.json"
+
+    @staticmethod
+    def _remove_partial(part_path, meta_path):
+        """Elimina el archivo parcial y sus metadatos"""
+        for path in (part_path, meta_path):
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _fetch(self, url, source_url, part_path, meta_path, previous):
+        """
+        Realiza un intento de descarga sobre el archivo parcial.
+        Si existe un parcial con validadores (ETag / Last-Modified) se pide
+        solo el rango faltante con 'Range' + 'If-Range'; si el servidor no
+        soporta rangos o el archivo cambió, responde 200 y se reinicia.
+
+        Returns:
+            tuple: (status_code, tamaño total esperado o None)
+        """
+        meta = None
+        if os.path.exists(part_path) and os.path.exists(meta_path):
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except Exception:
+                meta = None
+
+        offset = 0
+        headers = {}
+        if meta and meta.get('url') == source_url and (meta.get('etag') or meta.get('last_modified')):
+            offset = os.path.getsize(part_path)
+            headers['Range'] = f"bytes={offset}-"
+            headers['If-Range'] = meta.get('etag') or meta['last_modified']
+        elif previous:
+            # Validadores de la descarga anterior para la petición condicional
+            if previous.get('etag'):
+                headers['If-None-Match'] = previous['etag']
+            if previous.get('last_modified'):
+                headers['If-Modified-Since'] = previous['last_modified']
+
+        timeout = (config.download['connect_timeout'], config.download['read_timeout'])
+        with requests.get(url, stream=True, headers=headers, timeout=timeout) as response:
+            if response.status_code == 304:
+                return 304, None
+            if response.status_code == 416:
+                # El parcial no corresponde al archivo remoto: se descarta
+                self._remove_partial(part_path, meta_path)
+                return 416, None
+
+            total = None
+            if response.status_code == 206:
+                # Content-Range: bytes <inicio>-<fin>/<total>
+                content_range = response.headers.get('Content-Range', '')
+                range_start = content_range.replace('bytes ', '').split('-')[0]
+                if not range_start.isdigit() or int(range_start) != offset:
+                    self._remove_partial(part_path, meta_path)
+                    return 416, None
+                size = content_range.rsplit('/', 1)[-1]
+                total = int(size) if size.isdigit() else None
+                mode = 'ab'
+                logging.info(f"Reanudando descarga de {url} desde el byte {offset}")
+            elif response.status_code == 200:
+                length = response.headers.get('Content-Length')
+                # Con compresión de transporte el tamaño recibido no coincide con Content-Length
+                if length and length.isdigit() and 'Content-Encoding' not in response.headers:
+                    total = int(length)
+                mode = 'wb'
+                meta = {
+                    'url': source_url,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'total': total
+                }
+                with open(meta_path, 'w', encoding='utf-8') as f:
+                    json.dump(meta, f)
+            else:
+                return response.status_code, None
+
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=config.excel['chunk_size']):
+                    if chunk:
+                        f.write(chunk)
+            return response.status_code, total
+
+    @staticmethod
+    def _verify_workbook(file_path):
+        """
+        Verifica la integridad del archivo descargado: un .xlsx es un ZIP,
+        por lo que se validan su estructura y los CRC de cada entrada.
+        """
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                return archive.testzip() is None
+        except zipfile.BadZipFile:
+            return False
+
     def download_file(self, url, unique_id):
         """
         Descarga un archivo desde OneDrive y lo guarda localmente.
         Maneja errores de conexión y descarga.
+
+        Si el índice de descargas tiene una copia local de la URL, se realiza
+        una petición condicional (If-None-Match / If-Modified-Since). Ante un
+        304, o si el contenido descargado tiene el mismo SHA-256, se reutiliza
+        la copia anterior y el archivo se marca como sin cambios.
+
+        La descarga se escribe en un archivo parcial que se conserva ante
+        cortes o timeouts: los reintentos (y las ejecuciones siguientes)
+        continúan desde el último byte recibido mediante 'Range'.
         """
-        # Modificar URL si es de OneDrive
-        if "onedrive.live.com" in url.lower() or "1drv.ms" in url.lower():
-            url = self.modify_onedrive_link(url)
-        
+        # Clave estable de la fuente en el índice de descargas y los parciales
+        source_url = source_key(url)
         # Generar nombre temporal único para el archivo
         timestamp = datetime.now().strftime(config.formats['timestamp'])
         temp_filename = f"temp_{unique_id}_{timestamp}.xlsx"
         temp_path = os.path.join(self.downloads_folder, temp_filename)
 
-        try:
-            # Realizar la descarga en chunks para manejar archivos grandes
-            response = requests.get(url, stream=True)
-            if response.status_code == 200:
-                with open(temp_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=config.excel['chunk_size']):
-                        if chunk:
-                            f.write(chunk)
-                logging.info(f"Archivo descargado exitosamente como: {temp_path}")
-                return temp_path
-            else:
-                logging.error(f"Error al descargar {url}: Status {response.status_code}")
+        # Las fuentes locales se incorporan sin usar la red
+        if not is_http_source(url):
+            return self._copy_local(url, unique_id, temp_path)
+
+        # Modificar URL si es de OneDrive
+        if "onedrive.live.com" in url.lower() or "1drv.ms" in url.lower():
+            url = self.modify_onedrive_link(url)
+
+        previous = self.download_index.get(source_url)
+        part_path, meta_path = self._partial_paths(source_url)
+        max_retries = max(1, int(config.download['max_retries']))
+
+        for attempt in range(1, max_retries + 1):
+            try:
+                status, total = self._fetch(url, source_url, part_path, meta_path, previous)
+            except (requests.RequestException, OSError) as e:
+                logging.warning(f"Intento {attempt}/{max_retries} fallido al descargar {url}: {e}")
+                if attempt < max_retries:
+                    time.sleep(config.download['retry_backoff'] * attempt)
+                continue
+
+            if status == 304 and previous:
+                file_path = self._materialize(previous['file'], previous['sha256'], source_url, unique_id, temp_path)
+                self.download_index.update(source_url, self.blob_store.blob_path(previous['sha256']),
+                                           previous['sha256'], previous.get('etag'), previous.get('last_modified'))
+                logging.info(f"Archivo {unique_id} sin cambios (304), se reutiliza: {file_path}")
+                self.unchanged_files.add(file_path)
+                return file_path
+            if status == 416:
+                logging.warning(f"Descarga parcial de {url} descartada, se reinicia desde cero")
+                continue
+            if status not in (200, 206):
+                logging.error(f"Error al descargar {url}: Status {status}")
                 return None
-        except Exception as e:
-            logging.error(f"Excepción al descargar {url}: {e}")
-            if os.path.exists(temp_path):
-                try:
-                    os.remove(temp_path)
-                except:
-                    pass
+
+            # La conexión puede cerrarse sin error antes de recibir todo el contenido
+            received = os.path.getsize(part_path)
+            if total is not None and received < total:
+                logging.warning(f"Intento {attempt}/{max_retries}: descarga incompleta de {url} ({received}/{total} bytes)")
+                continue
+            break
+        else:
+            logging.error(f"Excepción al descargar {url}: se agotaron los {max_retries} intentos; "
+                          f"la descarga parcial se conserva para reanudarla")
+            return None
+
+        # Verificación de integridad del archivo completo
+        if (total is not None and received != total) or not self._verify_workbook(part_path):
+            logging.error(f"Error al descargar {url}: el archivo descargado está dañado")
+            self._remove_partial(part_path, meta_path)
             return None
 
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        sha256 = compute_sha256(part_path)
+        etag = meta.get('etag')
+        last_modified = meta.get('last_modified')
+
+        # El servidor no soporta validadores pero el contenido es idéntico
+        if previous and previous.get('sha256') == sha256:
+            self._remove_partial(part_path, meta_path)
+            file_path = self._materialize(previous['file'], sha256, source_url, unique_id, temp_path)
+            self.download_index.update(source_url, self.blob_store.blob_path(sha256), sha256, etag, last_modified)
+            logging.info(f"Archivo {unique_id} sin cambios (mismo SHA-256), se reutiliza: {file_path}")
+            self.unchanged_files.add(file_path)
+            return file_path
+
+        # El contenido se guarda una sola vez en el almacén, identificado por su hash
+        blob_path = self.blob_store.add(part_path, sha256)
+        self._remove_partial(part_path, meta_path)
+        file_path = self._materialize(blob_path, sha256, source_url, unique_id, temp_path)
+        self.download_index.update(source_url, blob_path, sha256, etag, last_modified)
+        logging.info(f"Archivo descargado exitosamente como: {file_path}")
+        return file_path
+
+    def _copy_local(self, file_path, unique_id, temp_path):
+        """
+        Obtiene una fuente local (archivo en disco): la incorpora al almacén
+        y la enlaza en la ejecución actual, igual que una descarga HTTP.
+        """
+        if not os.path.isfile(file_path):
+            logging.error(f"Error al descargar {file_path}: el archivo local no existe")
+            return None
+
+        sha256 = compute_sha256(file_path)
+        previous = self.download_index.get(file_path)
+        blob_path = self.blob_store.add_copy(file_path, sha256)
+        local_path = self._materialize(blob_path, sha256, file_path, unique_id, temp_path)
+        modified = datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat(timespec='seconds')
+        self.download_index.update(file_path, blob_path, sha256, last_modified=modified)
+
+        if previous and previous.get('sha256') == sha256:
+            logging.info(f"Archivo {unique_id} sin cambios (mismo SHA-256), se reutiliza: {local_path}")
+            self.unchanged_files.add(local_path)
+        else:
+            logging.info(f"Archivo local copiado exitosamente como: {local_path}")
+        return local_path
+
+    def _materialize(self, stored_path, sha256, source_url, unique_id, temp_path):
+        """
+        Hace disponible en la ejecución actual un archivo del almacén:
+        - 'hardlink': crea un enlace duro en la carpeta de ejecución
+        - 'manifest': usa directamente el archivo del almacén
+        En ambos casos se registra la entrada en el manifiesto de la ejecución.
+        """
+        blob_path = self.blob_store.blob_path(sha256)
+        if not os.path.exists(blob_path):
+            # Copia heredada fuera del almacén (ejecuciones anteriores): se incorpora
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            self.blob_store.link(stored_path, blob_path)
+
+        if config.store['link_mode'] == 'manifest':
+            file_path = blob_path
+        else:
+            file_path = self.blob_store.link(blob_path, temp_path)
+
+        self.manifest[unique_id] = {
+            'unique_id': unique_id,
+            'url': source_url,
+            'sha256': sha256,
+            'file': os.path.basename(file_path) if file_path != blob_path else None
+        }
+        return file_path
+
+    def file_sha256(self, file_path, unique_id):
+        """
+        SHA-256 del archivo, tomado del manifiesto de la ejecución solo si la
+        entrada de ese unique_id corresponde a este mismo archivo; si no, se
+        calcula sobre el archivo en disco. Retorna None si el archivo no se
+        puede leer (el error se reporta al extraerlo).
+        """
+        entry = self.manifest.get(unique_id)
+        if entry and entry.get('sha256'):
+            if entry.get('file'):
+                manifest_path = os.path.join(self.downloads_folder, entry['file'])
+            else:
+                manifest_path = self.blob_store.blob_path(entry['sha256'])
+            if os.path.abspath(manifest_path) == os.path.abspath(file_path):
+                return entry['sha256']
+        try:
+            return compute_sha256(file_path)
+        except OSError:
+            return None
+
+    def file_source(self, unique_id):
+        """Fuente del archivo (clave estable, ver sources.source_key), según el manifiesto"""
+        return self.manifest.get(unique_id, {}).get('url')
+
     def extract_data(self, file_path, unique_id):
         """
         Extrae y procesa los datos del archivo Excel descargado.
-        - Valida la estructura del archivo
+        - Si ya existe la partición transformada de este mismo contenido,
+          la retorna sin leer el archivo ('transformed': True)
+        - Si no, lee, valida y extrae los datos en una sola pasada
+          (WorkbookReader), o los carga desde la caché si el mismo
+          contenido ya fue leído
         - Renombra el archivo según la filial
-        - Lee los datos usando pandas
         """
         try:
-            wb = load_workbook(file_path, data_only=True)
-            
-            # Validar estructura del archivo
-            if not ExcelValidator.validate_structure(wb, file_path):
-                return None
-            
-            ws = wb[config.excel['structure']['sheet_name']]
-            
-            # Obtener nombre de la filial y renombrar archivo
-            filial = ws[config.excel['structure']['filial_cell']].value
-            if filial:
-                filial_name = filial.strip().replace(" ", "_").lower()
-                timestamp = datetime.now().strftime(config.formats['timestamp'])
-                new_filename = f"archivo_{filial_name}_{unique_id}_{timestamp}.xlsx"
-                new_path = os.path.join(self.downloads_folder, new_filename)
-                
-                os.rename(file_path, new_path)
-                file_path = new_path
-                logging.info(f"Archivo renombrado para filial {filial}: {new_path}")
-            
-            # Determinar el rango de datos válidos
-            mes_column = config.excel['structure']['columns']['mes']['column']
-            header_row = config.excel['structure']['header_row']
-            last_row = header_row
-            
-            for row in range(header_row + 1, ws.max_row + 1):
-                cell_value = ws[f"{mes_column}{row}"].value
-                if cell_value:
-                    last_row = row
+            with metrics.file('extract', os.path.basename(file_path)) as record:
+                sha256 = self.file_sha256(file_path, unique_id)
+                partition = self.partitions.get(sha256)
+                if partition:
+                    filial, df = partition
+                    logging.info(f"Filial {filial} sin cambios, se reutiliza su partición transformada")
+                    data = {'filial': filial, 'dataframe': df, 'sha256': sha256,
+                            'source': self.file_source(unique_id), 'transformed': True}
+                    record['source'] = 'partition'
                 else:
-                    break
-            
-            # Leer datos usando pandas hasta la última fila válida
-            df = pd.read_excel(
-                file_path, 
-                sheet_name=config.excel['structure']['sheet_name'],
-                header=config.excel['structure']['header_row']-1,
-                nrows=last_row-config.excel['structure']['header_row']+1
-            )
-            
-            return {
-                'filial': filial,
-                'dataframe': df
-            }
+                    data = self.parsed_cache.read(file_path, self.reader, sha256)
+                    if not data:
+                        return None
+                    data = dict(data, sha256=sha256, source=self.file_source(unique_id))
+                    record['source'] = 'read'
+
+                new_path = self.rename_file(file_path, data['filial'], unique_id)
+                data['file'] = os.path.basename(new_path)
+                record.update(filial=data['filial'], rows_out=len(data['dataframe']))
+            return data
             
         except Exception as e:
             logging.error(f"Error al extraer datos de {file_path}: {str(e)}")
             return None
+
+    def rename_file(self, file_path, filial, unique_id):
+        """
+        Renombra el archivo descargado según la filial y actualiza el manifiesto.
+        Solo se renombran las descargas nuevas; las copias reutilizadas ya
+        tienen su nombre final.
+        """
+        if not filial or not os.path.basename(file_path).startswith('temp_'):
+            return file_path
+
+        filial_name = str(filial).strip().replace(" ", "_").lower()
+        timestamp = datetime.now().strftime(config.formats['timestamp'])
+        new_filename = f"archivo_{filial_name}_{unique_id}_{timestamp}.xlsx"
+        new_path = os.path.join(self.downloads_folder, new_filename)
+        
+        os.rename(file_path, new_path)
+        if unique_id in self.manifest:
+            self.manifest[unique_id]['file'] = new_filename
+        logging.info(f"Archivo renombrado para filial {filial}: {new_path}")
+        return new_path
     
+    def _download_task(self, url, unique_id):
+        """
+        Descarga un archivo aislando cualquier error inesperado,
+        de modo que la falla de una URL no afecte al resto.
+        """
+        logging.info(f"Iniciando descarga del archivo {unique_id} desde: {url}")
+        with metrics.file('download', str(unique_id)) as record:
+            record['source'] = url
+            try:
+                file_path = self.download_file(url, unique_id)
+            except Exception as e:
+                logging.error(f"Excepción no controlada al descargar {url}: {e}")
+                return None
+            if file_path:
+                # Las copias reutilizadas (sin cambios) no cuentan como bytes transferidos
+                unchanged = file_path in self.unchanged_files
+                record['unchanged'] = unchanged
+                record['bytes'] = 0 if unchanged else os.path.getsize(file_path)
+                metrics.count('download.bytes', record['bytes'])
+                metrics.count('download_index.hits' if unchanged else 'download_index.misses')
+            return file_path
+
     def download_all_files(self, urls):
         """
         Descarga todos los archivos Excel desde las URLs proporcionadas.
+        Las descargas se ejecutan en paralelo con un máximo de
+        'max_concurrent_downloads' conexiones simultáneas.
+
+        Returns:
+            list: Pares (unique_id, ruta) de los archivos descargados, en el
+            orden de las fuentes. 'unique_id' es la posición de la fuente
+            (desde 1) y no cambia si otras descargas fallan.
         """
+        max_workers = max(1, int(config.download['max_concurrent_downloads']))
+        start_time = time.perf_counter()
+        self.sources = [source_key(url) for url in urls]
+
+        # Cada resultado se ubica en la posición de su unique_id para conservar el orden
+        results = [None] * len(urls)
+        if max_workers == 1 or len(urls) <= 1:
+            for idx, url in enumerate(urls, start=1):
+                results[idx - 1] = self._download_task(url, idx)
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+                futures = {
+                    executor.submit(self._download_task, url, idx): idx
+                    for idx, url in enumerate(urls, start=1)
+                }
+                for future in as_completed(futures):
+                    results[futures[future] - 1] = future.result()
+
         downloaded_files = []
-        for idx, url in enumerate(urls, start=1):
-            logging.info(f"Iniciando descarga del archivo {idx} desde: {url}")
-            file_path = self.download_file(url, idx)
+        for unique_id, (url, file_path) in enumerate(zip(urls, results), start=1):
             if file_path:
-                downloaded_files.append(file_path)
+                downloaded_files.append((unique_id, file_path))
             else:
                 logging.error(f"No se pudo descargar el archivo de: {url}")
+
+        # Reporte de rendimiento agregado de la fase de descarga
+        elapsed = time.perf_counter() - start_time
+        # Las copias reutilizadas (sin cambios) no cuentan como bytes transferidos
+        total_bytes = sum(os.path.getsize(path) for _, path in downloaded_files if path not in self.unchanged_files)
+        bytes_per_sec = total_bytes / elapsed if elapsed > 0 else 0
+        files_per_sec = len(downloaded_files) / elapsed if elapsed > 0 else 0
+        logging.info(
+            f"Descarga completada: {len(downloaded_files)}/{len(urls)} archivos "
+            f"({len(self.unchanged_files)} sin cambios), "
+            f"{total_bytes / 1024:.1f} KB en {elapsed:.2f}s "
+            f"({bytes_per_sec / 1024:.1f} KB/s, {files_per_sec:.2f} archivos/s, concurrencia {max_workers})"
+        )
         return downloaded_files
 
-    def process_files(self, file_paths):
+    def process_files(self, downloaded_files, checkpoints=None):
         """
         Procesa todos los archivos descargados y extrae sus datos.
+        Con 'checkpoints' (CheckpointStore) cada lote extraído se guarda al
+        terminar su archivo, y los lotes ya guardados por la ejecución que se
+        reanuda no se vuelven a leer.
+
+        Args:
+            downloaded_files (list): Pares (unique_id, ruta) de download_all_files
         """
         extracted_data = []
-        for idx, file_path in enumerate(file_paths, 1):
-            data = self.extract_data(file_path, idx)
+        for unique_id, file_path in downloaded_files:
+            data = checkpoints.load_extracted(unique_id) if checkpoints else None
+            if data:
+                metrics.record_file('extract', data.get('file') or os.path.basename(file_path),
+                                    filial=data['filial'], source='checkpoint', rows_out=len(data['dataframe']))
+            else:
+                data = self.extract_data(file_path, unique_id)
+                if data and checkpoints:
+                    checkpoints.save_extracted(unique_id, data)
             if data:
                 extracted_data.append(data)
             else:
                 logging.error(f"No se pudo extraer datos del archivo {file_path}")
+        self.finalize()
         return extracted_data
 
+    def finalize(self):
+        """
+        Cierra la fase de extracción: quita del índice de descargas las
+        fuentes que ya no están configuradas, escribe el manifiesto de la
+        ejecución y aplica la política de retención. El índice se guarda
+        recién cuando la carga termina con éxito (ver commit_index).
+        """
+        if self.sources is not None:
+            self.download_index.prune(self.sources)
+        if os.path.exists(self.downloads_folder):
+            entries = [self.manifest[unique_id] for unique_id in sorted(self.manifest)]
+            self.blob_store.write_manifest(self.downloads_folder, entries)
+        try:
+            self.blob_store.collect_garbage(
+                os.path.dirname(self.downloads_folder),
+                config.store['keep_executions'],
+                extra_hashes=self.download_index.hashes()
+            )
+        except Exception as e:
+            logging.warning(f"No se pudo aplicar la retención del almacén de descargas: {e}")
+
+    def commit_index(self):
+        """
+        Guarda el índice de descargas. main.py lo llama solo cuando la carga
+        terminó con éxito: si la ejecución falla antes, la siguiente no toma
+        sus fuentes como ya procesadas (sin cambios) y vuelve a generar la salida.
+        """
+        self.download_index.save()
+
+    def discard_execution(self):
+        """
+        Elimina la carpeta de la ejecución actual cuando no hay nada que procesar.
+        Solo contiene enlaces a archivos que siguen en el almacén.
+        """
+        self.download_index.save()
+        shutil.rmtree(self.downloads_folder, ignore_errors=True)
+
     def process_urls(self, urls):
         """
         Método principal que coordina todo el proceso de extracción:
@@ -230,6 +732,27 @@ class ExcelDownloader:
         2. Procesa cada archivo descargado
         3. Retorna los datos extraídos
         """
+        return self.process_files(self.prepare_files(urls))
+
+    def prepare_files(self, urls, skip_unchanged=None):
+        """
+        Descarga todos los archivos y retorna los pares (unique_id, ruta) a procesar.
+        Retorna una lista vacía (y marca all_unchanged) si ninguna fuente
+        cambió desde la última ejecución. 'skip_unchanged' reemplaza el valor
+        de config.json (una ejecución reanudada procesa aunque no haya cambios).
+        """
+        if skip_unchanged is None:
+            skip_unchanged = config.download['skip_unchanged']
+        urls = resolve_sources(urls, config.paths['project_root'])
         downloaded_files = self.download_all_files(urls)
         logging.info(f"Se descargaron {len(downloaded_files)} archivos exitosamente")
-        return self.process_files(downloaded_files)
\ No newline at end of file
+
+        # Si ninguna fuente cambió (ni se quitó) desde la última ejecución se omite el procesamiento
+        if (skip_unchanged and downloaded_files
+                and all(path in self.unchanged_files for _, path in downloaded_files)
+                and not self.download_index.removed(self.sources)):
+            self.all_unchanged = True
+            logging.info("Ninguna fuente cambió desde la última ejecución; se omite el procesamiento")
+            self.discard_execution()
+            return []
+        return downloaded_files
\ No newline at end of file
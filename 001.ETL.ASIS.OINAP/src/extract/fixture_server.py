@@ -0,0 +1,154 @@
+"""
+Servidor HTTP local de archivos de prueba
+Sirve los archivos Excel de un directorio simulando las condiciones de red
+de OneDrive (latencia y ancho de banda configurables) para medir y repetir
+la fase de extracción sin acceso a internet.
+
+Soporta ETag / Last-Modified (respuestas 304) y rangos (respuestas 206),
+de modo que también ejercita el índice de descargas y la reanudación.
+
+Uso:
+    python fixture_server.py <directorio> [--port 8000] [--latency-ms 200] [--bandwidth-kbps 512]
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import logging
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+
+def make_handler(directory, latency_ms=0, bandwidth_kbps=0):
+    """
+    Crea la clase manejadora de peticiones para un directorio y unas
+    condiciones de red determinadas.
+    """
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            logging.debug(f"fixture_server: {format % args}")
+
+        def _send_body(self, body):
+            """Envía el contenido respetando el ancho de banda configurado"""
+            if not bandwidth_kbps:
+                self.wfile.write(body)
+                return
+            chunk_size = 16 * 1024
+            bytes_per_sec = bandwidth_kbps * 1024
+            for start in range(0, len(body), chunk_size):
+                chunk = body[start:start + chunk_size]
+                self.wfile.write(chunk)
+                time.sleep(len(chunk) / bytes_per_sec)
+
+        def do_GET(self):
+            if latency_ms:
+                time.sleep(latency_ms / 1000)
+
+            name = unquote(urlparse(self.path).path).lstrip('/')
+            # Índice del directorio en JSON: lista de archivos disponibles
+            if not name:
+                body = json.dumps(sorted(f for f in os.listdir(directory) if f.endswith('.xlsx'))).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            path = os.path.join(directory, os.path.basename(name))
+            if not os.path.isfile(path):
+                self.send_error(404)
+                return
+
+            stat = os.stat(path)
+            etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+            last_modified = formatdate(stat.st_mtime, usegmt=True)
+
+            # Peticiones condicionales
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            since = self.headers.get('If-Modified-Since')
+            if since and not self.headers.get('If-None-Match'):
+                try:
+                    if int(stat.st_mtime) <= parsedate_to_datetime(since).timestamp():
+                        self.send_response(304)
+                        self.end_headers()
+                        return
+                except (TypeError, ValueError):
+                    pass
+
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            # Rangos: solo si el validador If-Range coincide con la versión actual
+            start = 0
+            range_header = self.headers.get('Range')
+            if range_header and self.headers.get('If-Range') in (etag, last_modified):
+                start = int(range_header.replace('bytes=', '').split('-')[0])
+            if start and start >= len(data):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(data)}")
+                self.end_headers()
+                return
+
+            body = data[start:]
+            self.send_response(206 if start else 200)
+            if start:
+                self.send_header('Content-Range', f"bytes {start}-{len(data) - 1}/{len(data)}")
+            self.send_header('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            self.send_header('Accept-Ranges', 'bytes')
+            self.end_headers()
+            self._send_body(body)
+
+    return FixtureHandler
+
+
+def start_server(directory, port=0, latency_ms=0, bandwidth_kbps=0):
+    """
+    Inicia el servidor en un hilo de fondo.
+
+    Returns:
+        tuple: (servidor, URL base)
+    """
+    handler = make_handler(os.path.abspath(directory), latency_ms, bandwidth_kbps)
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    logging.info(f"Servidor de prueba sirviendo {directory} en {base_url} "
+                 f"(latencia {latency_ms} ms, ancho de banda {bandwidth_kbps or 'ilimitado'} KB/s)")
+    return server, base_url
+
+
+def main():
+    """Ejecuta el servidor de prueba desde la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Servidor HTTP local de archivos Excel de prueba")
+    parser.add_argument('directory', help="Directorio con los archivos .xlsx a servir")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency-ms', type=int, default=0, help="Latencia por petición en milisegundos")
+    parser.add_argument('--bandwidth-kbps', type=int, default=0, help="Ancho de banda por conexión en KB/s (0 = ilimitado)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    server, base_url = start_server(args.directory, args.port, args.latency_ms, args.bandwidth_kbps)
+    print(f"Sirviendo en {base_url} (Ctrl+C para detener)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
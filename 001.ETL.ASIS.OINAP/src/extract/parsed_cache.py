@@ -0,0 +1,212 @@
+"""
+Caché de datos extraídos
+Este módulo guarda el resultado de leer un archivo Excel (filial + filas)
+en un artefacto columnar en disco (Parquet, o pickle si pyarrow no está
+instalado). La clave combina el SHA-256 del archivo con una huella de la
+configuración 'excel.structure' y 'rules', de modo que un cambio en el
+mapeo de columnas o en las reglas invalida automáticamente las entradas
+anteriores.
+"""
+
+import os
+import sys
+import json
+import pickle
+import hashlib
+import logging
+
+# Añadir el directorio src al path de Python de forma dinámica
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from config_loader import config
+from extract.download_index import compute_sha256
+from metrics import metrics
+
+# Importaciones opcionales con manejo de errores
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Versión del contenido de los artefactos; cambiarla invalida las entradas
+# anteriores (2: incluyen las filas excluidas en la lectura por cada regla)
+FORMAT_VERSION = 2
+
+
+def config_fingerprint():
+    """
+    Huella de la configuración que determina el resultado de la lectura.
+    """
+    relevant = {
+        'structure': config.excel['structure'],
+        'rules': config.rules,
+        'format': FORMAT_VERSION
+    }
+    payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def write_frame(base_path, filial, df, use_parquet=True, extra=None):
+    """
+    Guarda un DataFrame y su filial de forma atómica en '<base_path>.parquet'
+    (la filial va en los metadatos) o, si no es posible, en '<base_path>.pkl'.
+    'extra' son claves adicionales (serializables a JSON) que read_frame
+    agrega al resultado.
+
+    Returns:
+        str: Ruta del archivo escrito
+    """
+    # Sufijo por proceso para que escrituras concurrentes no compartan el temporal
+    tmp_suffix = f".{os.getpid()}.tmp"
+    if use_parquet and pq is not None:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            metadata = dict(table.schema.metadata or {})
+            metadata[b'filial'] = str(filial).encode('utf-8')
+            if extra:
+                metadata[b'extra'] = json.dumps(extra, ensure_ascii=False).encode('utf-8')
+            table = table.replace_schema_metadata(metadata)
+            pq.write_table(table, f"{base_path}.parquet{tmp_suffix}")
+            os.replace(f"{base_path}.parquet{tmp_suffix}", f"{base_path}.parquet")
+            return f"{base_path}.parquet"
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            # Columnas con tipos mixtos: se guarda en pickle
+            logging.debug(f"Parquet no soporta los datos de {base_path}, se usa pickle: {e}")
+    with open(f"{base_path}.pkl{tmp_suffix}", 'wb') as f:
+        pickle.dump(dict(extra or {}, filial=filial, dataframe=df), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f"{base_path}.pkl{tmp_suffix}", f"{base_path}.pkl")
+    return f"{base_path}.pkl"
+
+
+def read_frame(base_path):
+    """
+    Carga un artefacto escrito con write_frame.
+
+    Returns:
+        tuple: (ruta, {'filial', 'dataframe', claves de 'extra'}) o None si no existe
+    """
+    if os.path.exists(f"{base_path}.parquet") and pq is not None:
+        path = f"{base_path}.parquet"
+        table = pq.read_table(path)
+        metadata = table.schema.metadata
+        data = json.loads(metadata[b'extra'].decode('utf-8')) if b'extra' in metadata else {}
+        data.update(filial=metadata[b'filial'].decode('utf-8'), dataframe=table.to_pandas())
+        return path, data
+    if os.path.exists(f"{base_path}.pkl"):
+        path = f"{base_path}.pkl"
+        with open(path, 'rb') as f:
+            return path, pickle.load(f)
+    return None
+
+
+class ParsedCache:
+    """
+    Caché direccionada por contenido de los datos extraídos de cada archivo,
+    con desalojo por tamaño (se eliminan primero las entradas usadas hace más tiempo).
+    """
+
+    EXTENSIONS = ('.parquet', '.pkl')
+
+    def __init__(self, cache_dir=None):
+        settings = config.cache['parsed']
+        self.enabled = settings['enabled']
+        self.cache_dir = cache_dir or config.paths['parsed_cache']
+        self.max_size = int(settings['max_size_mb'] * 1024 * 1024)
+        self.use_parquet = settings['format'] == 'parquet' and pq is not None
+        self.fingerprint = config_fingerprint()
+        if self.enabled:
+            if not os.path.exists(self.cache_dir):
+                os.makedirs(self.cache_dir, exist_ok=True)
+            self._purge_stale()
+
+    def _entries(self):
+        """Lista (ruta, tamaño, última modificación) de los artefactos en caché"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(self.EXTENSIONS):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _purge_stale(self):
+        """Elimina artefactos generados con una configuración distinta a la actual"""
+        for path, _, _ in self._entries():
+            if not os.path.basename(path).startswith(f"{self.fingerprint}_"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _evict(self):
+        """Desaloja las entradas menos usadas hasta respetar 'max_size_mb'"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def _base_path(self, sha256):
+        return os.path.join(self.cache_dir, f"{self.fingerprint}_{sha256}")
+
+    def get(self, sha256):
+        """
+        Retorna {'filial', 'dataframe'} si el archivo ya fue leído con la
+        configuración actual, o None en caso contrario.
+        """
+        try:
+            found = read_frame(self._base_path(sha256))
+            if found is None:
+                return None
+            path, data = found
+            # Marcar como usada recientemente para el desalojo
+            os.utime(path)
+            return data
+        except Exception as e:
+            logging.warning(f"No se pudo leer la caché de datos extraídos para {sha256}: {e}")
+            return None
+
+    def put(self, sha256, data):
+        """Guarda el resultado de la lectura de forma atómica"""
+        try:
+            write_frame(self._base_path(sha256), data['filial'], data['dataframe'], self.use_parquet,
+                        extra={'excluded': data.get('excluded') or {}})
+            self._evict()
+        except Exception as e:
+            logging.warning(f"No se pudo guardar en la caché de datos extraídos {sha256}: {e}")
+
+    def read(self, file_path, reader, sha256=None):
+        """
+        Lee un archivo usando la caché: en caso de acierto carga el artefacto,
+        si no, lo lee con 'reader' y guarda el resultado. 'sha256' evita
+        volver a calcular el hash cuando ya se conoce (p. ej. del manifiesto).
+        """
+        if not self.enabled:
+            return reader.read(file_path)
+
+        if sha256 is None:
+            sha256 = compute_sha256(file_path)
+        data = self.get(sha256)
+        if data is not None:
+            logging.info(f"Datos de {file_path} cargados desde la caché")
+            metrics.count('parsed_cache.hits')
+            return data
+
+        metrics.count('parsed_cache.misses')
+        data = reader.read(file_path)
+        if data:
+            self.put(sha256, data)
+        return data
@@ -0,0 +1,134 @@
+"""
+Fuentes de archivos para la extracción
+Este módulo interpreta las entradas de 'excel_urls' y las expande a la
+lista de fuentes concretas que procesa el descargador:
+- URLs HTTP/HTTPS (OneDrive u otro servidor)
+- Rutas locales a un archivo (absolutas, relativas al proyecto o file://)
+- Directorios y patrones glob ('data/fixtures/*.xlsx')
+- Servidor de prueba local: {"type": "fixture", "directory": "...",
+  "latency_ms": 200, "bandwidth_kbps": 512}
+"""
+
+import os
+import glob
+import logging
+from urllib.parse import urlparse, unquote, quote
+
+# Servidores de prueba iniciados en esta ejecución (directorio -> URL base)
+_fixture_servers = {}
+# URL base de cada servidor de prueba -> directorio que sirve
+_fixture_directories = {}
+
+
+def is_http_source(source):
+    """Indica si la fuente se descarga por HTTP"""
+    return isinstance(source, str) and source.lower().startswith(('http://', 'https://'))
+
+
+def _resolve_path(entry, project_root):
+    """Convierte una entrada local (file://, relativa o absoluta) en ruta absoluta"""
+    if entry.lower().startswith('file://'):
+        entry = unquote(urlparse(entry).path)
+        # En Windows las rutas file:///C:/... quedan como /C:/...
+        if len(entry) > 2 and entry[0] == '/' and entry[2] == ':':
+            entry = entry[1:]
+    if not os.path.isabs(entry):
+        entry = os.path.join(project_root, entry)
+    return os.path.normpath(entry)
+
+
+def _expand_local(entry, project_root):
+    """Expande un archivo, directorio o patrón glob local a rutas de archivos .xlsx"""
+    path = _resolve_path(entry, project_root)
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, '*.xlsx')))
+    if glob.has_magic(path):
+        return sorted(p for p in glob.glob(path) if os.path.isfile(p))
+    if os.path.isfile(path):
+        return [path]
+    logging.error(f"La fuente local no existe: {entry}")
+    return []
+
+
+def _expand_fixture(entry, project_root):
+    """
+    Inicia (una sola vez por directorio) el servidor de prueba y retorna
+    las URLs de sus archivos.
+    """
+    from extract.fixture_server import start_server
+
+    directory = _resolve_path(entry['directory'], project_root)
+    key = (directory, entry.get('latency_ms', 0), entry.get('bandwidth_kbps', 0))
+    if key not in _fixture_servers:
+        _, base_url = start_server(
+            directory,
+            port=entry.get('port', 0),
+            latency_ms=entry.get('latency_ms', 0),
+            bandwidth_kbps=entry.get('bandwidth_kbps', 0)
+        )
+        _fixture_servers[key] = base_url
+        _fixture_directories[base_url] = directory
+    base_url = _fixture_servers[key]
+    names = sorted(f for f in os.listdir(directory) if f.endswith('.xlsx'))
+    return [f"{base_url}/{quote(name)}" for name in names]
+
+
+def source_key(source):
+    """
+    Clave estable de una fuente para el índice de descargas y las descargas
+    parciales. El servidor de prueba usa un puerto distinto en cada
+    ejecución, así que sus URLs se identifican por la ruta del archivo que
+    sirven (la misma que lista describe_sources); las demás fuentes son su
+    propia clave.
+    """
+    if is_http_source(source):
+        for base_url, directory in _fixture_directories.items():
+            if source.startswith(f"{base_url}/"):
+                return os.path.join(directory, unquote(source[len(base_url) + 1:]))
+    return source
+
+
+def resolve_sources(entries, project_root):
+    """
+    Expande las entradas configuradas en 'excel_urls' a una lista de fuentes
+    (URLs HTTP o rutas locales absolutas), conservando el orden configurado.
+    """
+    sources = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            if entry.get('type') == 'fixture':
+                sources.extend(_expand_fixture(entry, project_root))
+            else:
+                logging.error(f"Tipo de fuente no soportado: {entry}")
+        elif is_http_source(entry):
+            sources.append(entry)
+        else:
+            sources.extend(_expand_local(entry, project_root))
+    return sources
+
+
+def describe_sources(entries, project_root):
+    """
+    Igual que resolve_sources pero sin efectos secundarios (no inicia los
+    servidores de prueba), para listar las fuentes configuradas.
+
+    Returns:
+        list: Tuplas (tipo, fuente) con tipo "http", "local" o "fixture"
+    """
+    sources = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            if entry.get('type') == 'fixture':
+                directory = _resolve_path(entry['directory'], project_root)
+                if os.path.isdir(directory):
+                    sources.extend(('fixture', os.path.join(directory, name))
+                                   for name in sorted(os.listdir(directory)) if name.endswith('.xlsx'))
+                else:
+                    logging.error(f"El directorio de prueba no existe: {entry['directory']}")
+            else:
+                logging.error(f"Tipo de fuente no soportado: {entry}")
+        elif is_http_source(entry):
+            sources.append(('http', entry))
+        else:
+            sources.extend(('local', path) for path in _expand_local(entry, project_root))
+    return sources
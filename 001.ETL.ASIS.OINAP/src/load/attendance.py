@@ -0,0 +1,54 @@
+"""
+Conteo de asistencias
+Este módulo convierte las columnas de semanas (sem1-sem4) en indicadores
+int8 (1 si el código es de asistencia, 0 en caso contrario) una sola vez
+para todo el lote, de modo que la agregación por grupos use funciones
+nativas de pandas ('sum' / 'max') en lugar de una función Python por grupo.
+
+Configuración ('load.attendance'):
+- columns: columnas de semanas
+- present_codes: códigos que cuentan como asistencia (p. ej. ["P"])
+- aggregation: "sum" (cantidad de asistencias) o "max" (asistió al menos una vez)
+"""
+
+import os
+import sys
+import numpy as np
+
+# Añadir el directorio src al path de Python de forma dinámica
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from config_loader import config, ATTENDANCE_AGGREGATIONS as AGGREGATIONS
+
+
+class AttendanceCounter:
+    """
+    Prepara los indicadores de asistencia y sus reglas de agregación.
+    """
+
+    def __init__(self, settings=None):
+        settings = settings or config.load['attendance']
+        self.columns = list(settings['columns'])
+        self.present_codes = list(settings['present_codes'])
+        self.aggregation = settings.get('aggregation', 'sum')
+        if self.aggregation not in AGGREGATIONS:
+            raise ValueError(f"Agregación de asistencias no soportada: {self.aggregation}")
+
+    def add_indicators(self, df):
+        """
+        Reemplaza cada columna de semana por su indicador int8.
+        Las columnas ausentes se crean en 0.
+        """
+        for column in self.columns:
+            if column in df.columns:
+                df[column] = df[column].isin(self.present_codes).astype('int8')
+            else:
+                df[column] = np.zeros(len(df), dtype='int8')
+        return df
+
+    def aggregations(self):
+        """Reglas de agregación nativas para las columnas de semanas"""
+        return {column: self.aggregation for column in self.columns}
@@ -0,0 +1,171 @@
+"""
+Carga del consolidado en base de datos
+Este módulo escribe el consolidado en una tabla de MySQL, SQL Server,
+PostgreSQL o SQLite usando la conexión de sqlConnection/sql_executor.py
+(SQLExecutor). Cada motor usa su vía de carga masiva más rápida:
+- mssql (pyodbc): executemany con fast_executemany
+- postgres (psycopg2): COPY ... FROM STDIN con lotes en formato CSV
+- mysql (pymysql): executemany, que pymysql agrupa en INSERT multi-fila
+- sqlite: executemany
+
+La carga se realiza por lotes dentro de una sola transacción: si falla,
+la tabla queda como estaba.
+"""
+
+import io
+import os
+import sys
+import time
+import logging
+import pandas as pd
+
+# Añadir el directorio src al path de Python de forma dinámica
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from config_loader import config
+
+# SQLExecutor vive en el proyecto hermano sqlConnection
+sql_connection_dir = config.paths['sql_connection_dir']
+if sql_connection_dir not in sys.path:
+    sys.path.append(sql_connection_dir)
+
+# Importaciones opcionales con manejo de errores
+try:
+    from sql_executor import SQLExecutor
+except ImportError:
+    SQLExecutor = None
+
+# Marcador de parámetros por motor
+PARAMSTYLE = {
+    'mssql': '?',
+    'sqlite': '?',
+    'mysql': '%s',
+    'postgres': '%s'
+}
+
+# Tipos de columna por motor: (texto, entero, fecha)
+COLUMN_TYPES = {
+    'mssql': ('NVARCHAR(255)', 'INT', 'DATETIME2'),
+    'mysql': ('VARCHAR(255)', 'INT', 'DATETIME'),
+    'postgres': ('TEXT', 'INTEGER', 'TIMESTAMP'),
+    'sqlite': ('TEXT', 'INTEGER', 'TEXT')
+}
+
+
+class DatabaseSink:
+    """
+    Destino de salida que carga el consolidado en una tabla de base de datos.
+    Configuración ('load.sinks.database'): db_type, server, database,
+    username, password, port, table, mode ("replace" | "append"), batch_size.
+    """
+
+    def __init__(self, settings):
+        self.db_type = settings['db_type']
+        if self.db_type not in PARAMSTYLE:
+            raise ValueError(f"Tipo de base de datos no soportado: {self.db_type}")
+        self.settings = settings
+        self.table = settings.get('table', 'consolidado')
+        self.mode = settings.get('mode', 'replace')
+        self.batch_size = max(1, int(settings.get('batch_size', 5000)))
+
+    def _quote(self, name):
+        if self.db_type == 'mssql':
+            return f"[{name}]"
+        if self.db_type == 'mysql':
+            return f"`{name}`"
+        return f'"{name}"'
+
+    def _executor(self):
+        if SQLExecutor is None:
+            raise RuntimeError(f"No se encontró sql_executor.py en {sql_connection_dir}")
+        database = self.settings.get('database')
+        if self.db_type == 'sqlite' and database and not os.path.isabs(database):
+            database = os.path.join(config.paths['project_root'], database)
+        return SQLExecutor(
+            db_type=self.db_type,
+            server=self.settings.get('server'),
+            database=database,
+            username=self.settings.get('username'),
+            password=self.settings.get('password'),
+            port=self.settings.get('port')
+        )
+
+    def _create_table_sql(self, df):
+        text_type, int_type, date_type = COLUMN_TYPES[self.db_type]
+        definitions = []
+        for column in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[column]):
+                column_type = date_type
+            elif pd.api.types.is_integer_dtype(df[column]):
+                column_type = int_type
+            else:
+                column_type = text_type
+            definitions.append(f"{self._quote(column)} {column_type}")
+        create = f"CREATE TABLE {self._quote(self.table)} ({', '.join(definitions)})"
+        if self.db_type == 'mssql':
+            return f"IF OBJECT_ID(N'{self.table}', N'U') IS NULL {create}"
+        return create.replace('CREATE TABLE', 'CREATE TABLE IF NOT EXISTS', 1)
+
+    def _batches(self, df):
+        """Lotes de filas como tuplas de valores nativos de Python"""
+        for start in range(0, len(df), self.batch_size):
+            batch = df.iloc[start:start + self.batch_size]
+            values = batch.astype(object).where(batch.notna(), None)
+            for column in batch.columns:
+                if pd.api.types.is_datetime64_any_dtype(batch[column]):
+                    # SQLite no tiene tipo fecha: se guarda en ISO 8601
+                    convert = (lambda v: v.isoformat()) if self.db_type == 'sqlite' else (lambda v: v.to_pydatetime())
+                    values[column] = [convert(v) if v is not None else None for v in values[column]]
+            yield batch, list(values.itertuples(index=False, name=None))
+
+    def _insert(self, cursor, df):
+        """Inserta todas las filas con la vía masiva del motor"""
+        columns = ', '.join(self._quote(column) for column in df.columns)
+        if self.db_type == 'postgres':
+            copy_sql = f"COPY {self._quote(self.table)} ({columns}) FROM STDIN WITH (FORMAT csv)"
+            for batch, _ in self._batches(df):
+                buffer = io.StringIO()
+                batch.to_csv(buffer, header=False, index=False, date_format='%Y-%m-%d %H:%M:%S')
+                buffer.seek(0)
+                cursor.copy_expert(copy_sql, buffer)
+            return
+
+        if self.db_type == 'mssql':
+            cursor.fast_executemany = True
+        marker = PARAMSTYLE[self.db_type]
+        insert_sql = (
+            f"INSERT INTO {self._quote(self.table)} ({columns}) "
+            f"VALUES ({', '.join(marker for _ in df.columns)})"
+        )
+        for _, rows in self._batches(df):
+            cursor.executemany(insert_sql, rows)
+
+    def write(self, df, output_dir, name):
+        executor = self._executor()
+        if not executor.connect():
+            raise RuntimeError(f"No se pudo conectar a la base de datos {self.db_type}")
+        connection = executor.connection
+        cursor = executor.cursor
+        start_time = time.perf_counter()
+        try:
+            if self.db_type == 'sqlite':
+                # sqlite3 no abre la transacción antes de sentencias DDL
+                cursor.execute('BEGIN')
+            cursor.execute(self._create_table_sql(df))
+            if self.mode == 'replace':
+                cursor.execute(f"DELETE FROM {self._quote(self.table)}")
+            self._insert(cursor, df)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            executor.close()
+
+        elapsed = time.perf_counter() - start_time
+        rows_per_sec = len(df) / elapsed if elapsed > 0 else 0
+        logging.info(f"Carga en base de datos ({self.db_type}): {len(df)} filas en {elapsed:.2f}s ({rows_per_sec:.0f} filas/s)")
+        return f"{self.db_type}:{self.table}"
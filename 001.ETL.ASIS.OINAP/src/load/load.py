@@ -1,12 +1,12 @@
 """
 Módulo de Carga (Load)
 Este módulo se encarga de la consolidación final de los datos transformados
-en un archivo Excel que contiene el resumen de todas las filiales.
+en un resumen de todas las filiales, escrito en los destinos configurados
+en 'load.sinks' (Excel, Parquet, CSV, SQLite).
 """
 
 import os
 import sys
-import pandas as pd
 import logging
 from datetime import datetime
 
@@ -17,11 +17,16 @@ if src_dir not in sys.path:
     sys.path.append(src_dir)
 
 from config_loader import config
+from extract.sources import describe_sources
+from load.attendance import AttendanceCounter
+from load.sinks import create_sinks
+from load.state_store import StateStore
+from metrics import metrics
 
 class ExcelWriter:
     """
-    Clase encargada de escribir los datos consolidados en un archivo Excel.
-    Maneja la agregación de datos y la generación del archivo final.
+    Clase encargada de escribir los datos consolidados.
+    Maneja la agregación de datos y su escritura en cada destino configurado.
     """
     
     def __init__(self, summary_dir):
@@ -39,28 +44,44 @@ class ExcelWriter:
         
         El proceso incluye:
         1. Validación de datos de entrada
-        2. Creación de DataFrame con estructura específica
+        2. Preparación del DataFrame con estructura específica
         3. Agregación de datos por filial, mes, día y grupo
-        4. Generación de archivo Excel con timestamp único
+        4. Si 'load.state.enabled', fusión con el consolidado histórico:
+           solo se agregan las filiales cuyos archivos cambiaron, se
+           eliminan las que ya no provienen de ninguna fuente configurada y
+           el resultado es el estado completo
+        5. Escritura en cada destino configurado con timestamp único
         
         Args:
-            data (dict): Diccionario con los datos transformados
+            data (dict): Diccionario con las filiales ('filiales'), el
+                DataFrame de registros transformados ('dataframe'), los
+                hashes de los archivos de origen por filial ('sources') y
+                sus fuentes ('origins')
             
         Returns:
             bool: True si el proceso fue exitoso, False en caso contrario
         """
         try:
-            if not data or 'registros' not in data:
+            if not data or 'dataframe' not in data:
                 logging.error("No hay datos para escribir")
                 return False
             
-            # Crear DataFrame base con los nuevos registros
-            new_df = pd.DataFrame(data['registros'])
+            # DataFrame base con los nuevos registros (se copia para no
+            # modificar el lote recibido al completar columnas)
+            new_df = data['dataframe'].copy()
             
             # Asegurar que existe la columna de filial
             if 'filial' not in new_df.columns and data.get('filiales'):
                 new_df['filial'] = data['filiales'][0]
             
+            # Con estado histórico solo se agregan las filiales que cambiaron
+            state = StateStore() if config.load['state']['enabled'] else None
+            if state:
+                sources = data.get('sources') or {filial: [None] for filial in data.get('filiales', [])}
+                changed = state.changed_filiales(sources)
+                logging.info(f"{len(changed)} de {len(sources)} filiales cambiaron respecto del consolidado histórico")
+                new_df = new_df[new_df['filial'].isin(changed)]
+            
             # Definir el orden de las columnas base del reporte
             base_columns = [
                 'filial',      # Identificador de la filial
@@ -76,51 +97,59 @@ class ExcelWriter:
                 if col not in new_df.columns:
                     new_df[col] = None
             
-            # Procesar columnas de semanas (sem1-sem4)
-            sem_columns = []
-            for sem in ['sem1', 'sem2', 'sem3', 'sem4']:
-                if sem in new_df.columns:
-                    sem_columns.append(sem)
-                else:
-                    # Crear columnas de semanas si no existen
-                    new_df[sem] = None
-                    sem_columns.append(sem)
+            # Columnas de semanas (sem1-sem4) como indicadores de asistencia int8
+            attendance = AttendanceCounter()
+            sem_columns = attendance.columns
             
             # Ordenar columnas según estructura requerida
             column_order = base_columns + sem_columns
-            new_df = new_df[column_order]
+            new_df = attendance.add_indicators(new_df[[col for col in column_order if col in new_df.columns]])
             
-            # Definir reglas de agregación para cada columna
+            # Definir reglas de agregación para cada columna (solo funciones
+            # nativas de pandas, sin funciones Python por grupo)
             agg_dict = {
                 'fechainicio': 'max',      # Última fecha de inicio
                 'tipoinscrito': 'first'    # Primer tipo de inscrito
             }
+            # Contar asistencias por semana
+            agg_dict.update(attendance.aggregations())
             
-            # Configurar agregación para columnas de semanas
-            for sem in ['sem1', 'sem2', 'sem3', 'sem4']:
-                # Contar asistencias ('P') por semana
-                agg_dict[sem] = lambda x: (x == 'P').sum() if x.dtype == object else 0
-            
-            # Aplicar agregación por grupos clave
+            # Aplicar agregación por grupos clave (observed=True: solo las
+            # combinaciones presentes de las columnas categóricas)
             aggregated_df = new_df.groupby(
                 ['filial', 'mes', 'diaclase', 'grupo'], 
-                as_index=False
+                as_index=False,
+                observed=True
             ).agg(agg_dict)
             
             # Ordenar columnas en el resultado final
-            final_columns = base_columns + ['sem1', 'sem2', 'sem3', 'sem4']
+            final_columns = base_columns + sem_columns
             final_df = aggregated_df[final_columns]
             
-            # Crear nombre único para el archivo con timestamp
-            timestamp = datetime.now().strftime(config.formats['timestamp'])
-            new_consolidated_filename = f'consolidated_{timestamp}.xlsx'
-            new_consolidated_path = os.path.join(self.summary_dir, new_consolidated_filename)
+            # Fusionar con el consolidado histórico y usar el estado completo
+            if state:
+                state.merge(final_df, sources, changed)
+                if data.get('origins') is not None:
+                    configured = {source for _, source in describe_sources(config.excel_urls, config.paths['project_root'])}
+                    state.prune(data['origins'], configured)
+                final_df = state.load(final_columns)
+            metrics.add_rows('load', len(data['dataframe']), len(final_df))
             
-            # Guardar resultado final
-            final_df.to_excel(new_consolidated_path, index=False, sheet_name='Consolidado')
+            # Crear nombre único para la salida con timestamp
+            timestamp = datetime.now().strftime(config.formats['timestamp'])
+            output_name = f'consolidated_{timestamp}'
             
-            logging.info(f"Nuevo archivo consolidado creado exitosamente: {new_consolidated_path}")
-            return True
+            # Guardar resultado final en cada destino; la falla de uno no impide los demás
+            success = True
+            for sink_name, sink in create_sinks():
+                try:
+                    with metrics.file('load', sink_name):
+                        output_path = sink.write(final_df, self.summary_dir, output_name)
+                    logging.info(f"Nuevo consolidado ({sink_name}) creado exitosamente: {output_path}")
+                except Exception as e:
+                    logging.error(f"Error al escribir el consolidado ({sink_name}): {e}")
+                    success = False
+            return success
             
         except Exception as e:
             logging.error(f"Error al crear el archivo consolidado: {e}")
@@ -0,0 +1,223 @@
+"""
+Destinos de salida del consolidado
+Este módulo define los formatos en que se puede escribir el resultado
+consolidado. Los destinos activos se configuran en 'load.sinks.enabled':
+- xlsx: libro Excel para consumo humano (consolidated_<timestamp>.xlsx)
+- parquet: dataset Parquet particionado (por filial y mes por defecto)
+- csv: CSV comprimido (consolidated_<timestamp>.csv.gz)
+- sqlite: tabla en una base SQLite que se reemplaza en cada ejecución
+- database: tabla en MySQL, SQL Server, PostgreSQL o SQLite mediante
+  SQLExecutor (ver load/database.py)
+
+Todos los destinos escriben de forma atómica: el resultado se genera en un
+temporal y solo se publica (os.replace / renombrado de tabla) si terminó
+correctamente.
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import logging
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+# Añadir el directorio src al path de Python de forma dinámica
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from config_loader import config
+
+
+class XlsxSink:
+    """
+    Libro Excel. En modo 'streaming' usa un libro write-only de openpyxl:
+    las filas se emiten por lotes y no se construye el modelo completo del
+    libro en memoria, por lo que el consumo de memoria no depende del tamaño
+    del resultado. En modo 'pandas' se usa to_excel.
+    """
+
+    def __init__(self, settings):
+        self.mode = settings.get('mode', 'streaming')
+        self.batch_rows = max(1, int(settings.get('batch_rows', 10000)))
+        self.sheet_name = settings.get('sheet_name', 'Consolidado')
+
+    def write(self, df, output_dir, name):
+        path = os.path.join(output_dir, f"{name}.xlsx")
+        # El temporal conserva la extensión .xlsx (pandas la exige para elegir el motor)
+        tmp_path = os.path.join(output_dir, f"{name}.{os.getpid()}.tmp.xlsx")
+        try:
+            if self.mode != 'streaming':
+                with pd.ExcelWriter(tmp_path, engine='openpyxl') as excel_writer:
+                    df.to_excel(excel_writer, index=False, sheet_name=self.sheet_name)
+            else:
+                self._write_streaming(df, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def _write_streaming(self, df, path):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(self.sheet_name)
+        header = []
+        for column in df.columns:
+            cell = WriteOnlyCell(ws, value=str(column))
+            cell.font = Font(bold=True)
+            header.append(cell)
+        ws.append(header)
+
+        # Las columnas de fecha conservan el formato de fecha de Excel
+        date_columns = [
+            idx for idx, column in enumerate(df.columns)
+            if pd.api.types.is_datetime64_any_dtype(df[column])
+        ]
+        for start in range(0, len(df), self.batch_rows):
+            batch = df.iloc[start:start + self.batch_rows].astype(object)
+            batch = batch.where(batch.notna(), None)
+            for row in batch.itertuples(index=False, name=None):
+                if date_columns:
+                    row = list(row)
+                    for idx in date_columns:
+                        if row[idx] is not None:
+                            cell = WriteOnlyCell(ws, value=row[idx].to_pydatetime())
+                            cell.number_format = 'yyyy-mm-dd hh:mm:ss'
+                            row[idx] = cell
+                ws.append(row)
+        wb.save(path)
+
+
+class ParquetSink:
+    """
+    Dataset Parquet particionado al estilo Hive (filial=.../mes=.../*.parquet).
+    El dataset se escribe en un directorio temporal que luego se renombra.
+    """
+
+    def __init__(self, settings):
+        self.partition_by = list(settings.get('partition_by', ['filial', 'mes']))
+        self.compression = settings.get('compression', 'snappy')
+
+    def write(self, df, output_dir, name):
+        # pyarrow se importa solo si el destino Parquet está activo
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("pyarrow no está instalado; no se puede escribir Parquet")
+        path = os.path.join(output_dir, f"{name}.parquet")
+        tmp_path = os.path.join(output_dir, f"{name}.{os.getpid()}.tmp.parquet")
+        try:
+            # Las columnas de partición se escriben como texto para nombres de carpeta estables
+            table_df = df.copy()
+            for column in self.partition_by:
+                table_df[column] = table_df[column].astype(str)
+            table = pa.Table.from_pandas(table_df, preserve_index=False)
+            pq.write_to_dataset(
+                table,
+                root_path=tmp_path,
+                partition_cols=self.partition_by or None,
+                compression=self.compression
+            )
+            if os.path.exists(path):
+                shutil.rmtree(path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                shutil.rmtree(tmp_path, ignore_errors=True)
+        return path
+
+
+class CsvSink:
+    """CSV comprimido (gzip por defecto)"""
+
+    EXTENSIONS = {'gzip': '.gz', 'bz2': '.bz2', 'zip': '.zip', 'xz': '.xz', 'zstd': '.zst'}
+
+    def __init__(self, settings):
+        self.compression = settings.get('compression', 'gzip')
+
+    def write(self, df, output_dir, name):
+        extension = self.EXTENSIONS.get(self.compression, '')
+        path = os.path.join(output_dir, f"{name}.csv{extension}")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            df.to_csv(tmp_path, index=False, compression=self.compression, encoding='utf-8')
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+
+class SqliteSink:
+    """
+    Tabla SQLite. Los datos se cargan en una tabla temporal y se reemplaza la
+    tabla definitiva en una sola transacción.
+    """
+
+    def __init__(self, settings):
+        self.database = settings.get('database', 'consolidated.sqlite')
+        self.table = settings.get('table', 'consolidado')
+
+    def write(self, df, output_dir, name):
+        path = self.database if os.path.isabs(self.database) else os.path.join(output_dir, self.database)
+        tmp_table = f"{self.table}_tmp"
+        # Nivel de aislamiento por defecto: todas las filas se insertan en una
+        # sola transacción implícita que pandas confirma una vez (en modo
+        # autocommit cada fila sería su propia transacción)
+        con = sqlite3.connect(path)
+        try:
+            table_df = df.copy()
+            for column in table_df.columns:
+                if isinstance(table_df[column].dtype, pd.CategoricalDtype):
+                    table_df[column] = table_df[column].astype(object)
+            table_df.to_sql(tmp_table, con, if_exists='replace', index=False, chunksize=10000)
+            # El reemplazo de la tabla definitiva es atómico
+            con.execute('BEGIN')
+            con.execute(f'DROP TABLE IF EXISTS "{self.table}"')
+            con.execute(f'ALTER TABLE "{tmp_table}" RENAME TO "{self.table}"')
+            con.commit()
+        except Exception:
+            if con.in_transaction:
+                con.rollback()
+            raise
+        finally:
+            con.close()
+        return f"{path}:{self.table}"
+
+
+def _database_sink(settings):
+    """Crea el destino de base de datos (importa SQLExecutor y sus drivers solo si está activo)"""
+    from load.database import DatabaseSink
+    return DatabaseSink(settings)
+
+
+# Destinos disponibles por nombre (config_loader.SINK_NAMES los valida en config.json)
+SINKS = {
+    'xlsx': XlsxSink,
+    'parquet': ParquetSink,
+    'csv': CsvSink,
+    'sqlite': SqliteSink,
+    'database': _database_sink
+}
+
+
+def create_sinks(settings=None):
+    """
+    Crea los destinos activos según 'load.sinks'.
+
+    Returns:
+        list: Tuplas (nombre, destino)
+    """
+    settings = settings or config.load['sinks']
+    sinks = []
+    for sink_name in settings['enabled']:
+        if sink_name not in SINKS:
+            logging.error(f"Destino de salida no soportado: {sink_name}")
+            continue
+        sinks.append((sink_name, SINKS[sink_name](settings.get(sink_name, {}))))
+    return sinks
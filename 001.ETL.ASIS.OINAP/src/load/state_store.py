@@ -0,0 +1,253 @@
+"""
+Estado consolidado persistente
+Este módulo mantiene el consolidado histórico en una base SQLite con una
+fila por grupo (filial, mes, diaclase, grupo). En cada ejecución solo se
+agregan las filiales cuyos archivos de origen cambiaron; sus grupos se
+actualizan (upsert) y los que ya no existen se eliminan. Las demás
+filiales se conservan tal como quedaron en ejecuciones anteriores, y el
+consolidado final se obtiene leyendo el estado completo.
+
+Cada filial registra las fuentes (ver extract/sources.source_key) de las que
+proviene. Una filial se elimina del estado cuando ninguna de sus fuentes
+sigue configurada en 'excel_urls' o cuando todas pasaron a otra filial
+(p. ej. si cambió el nombre en la celda de filial). La filial de una fuente
+configurada cuya descarga falló se conserva.
+
+Si cambia la configuración que determina el resultado (estructura, reglas
+o conteo de asistencias) el estado se reconstruye desde cero.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import sqlite3
+import logging
+from datetime import datetime
+import pandas as pd
+
+# Añadir el directorio src al path de Python de forma dinámica
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from config_loader import config
+from extract.parsed_cache import config_fingerprint
+from schema import apply_schema, field_dtypes
+
+KEY_COLUMNS = ['filial', 'mes', 'diaclase', 'grupo']
+
+
+def state_fingerprint():
+    """Huella de la configuración que determina el contenido del consolidado"""
+    payload = json.dumps({
+        'transform': config_fingerprint(),
+        'attendance': config.load['attendance']
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class StateStore:
+    """
+    Consolidado histórico en SQLite con upsert por grupo.
+    Tablas:
+    - consolidado: una fila por (filial, mes, diaclase, grupo)
+    - fuentes: firma de los archivos de origen con que se calculó cada
+      filial y las fuentes de las que proviene
+    - meta: huella de la configuración
+    """
+
+    TABLE = 'consolidado'
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or config.paths['state_db']
+        directory = os.path.dirname(self.db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self.fingerprint = state_fingerprint()
+        self._reset_if_stale()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, isolation_level=None)
+
+    def _reset_if_stale(self):
+        """Descarta el estado si fue calculado con otra configuración"""
+        con = self._connect()
+        try:
+            con.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            con.execute('CREATE TABLE IF NOT EXISTS fuentes '
+                        '(filial TEXT PRIMARY KEY, firma TEXT, actualizado TEXT, origenes TEXT)')
+            # Estados anteriores sin el registro de fuentes por filial
+            columns = [row[1] for row in con.execute('PRAGMA table_info(fuentes)')]
+            if 'origenes' not in columns:
+                con.execute('ALTER TABLE fuentes ADD COLUMN origenes TEXT')
+            row = con.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+            if row and row[0] == self.fingerprint:
+                return
+            if row:
+                logging.info("La configuración cambió; se reconstruye el consolidado histórico")
+            con.execute('BEGIN')
+            con.execute(f'DROP TABLE IF EXISTS {_quote(self.TABLE)}')
+            con.execute('DELETE FROM fuentes')
+            con.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)", (self.fingerprint,))
+            con.execute('COMMIT')
+        finally:
+            con.close()
+
+    @staticmethod
+    def _signature(hashes):
+        """Firma de los archivos de una filial (None si algún hash es desconocido)"""
+        if not hashes or any(sha256 is None for sha256 in hashes):
+            return None
+        return hashlib.sha256('|'.join(sorted(hashes)).encode('utf-8')).hexdigest()
+
+    def changed_filiales(self, sources):
+        """
+        Filiales cuyos archivos de origen cambiaron desde la última carga.
+
+        Args:
+            sources (dict): filial -> [SHA-256 de sus archivos]
+        """
+        con = self._connect()
+        try:
+            stored = dict(con.execute('SELECT filial, firma FROM fuentes').fetchall())
+        finally:
+            con.close()
+        changed = []
+        for filial, hashes in sources.items():
+            signature = self._signature(hashes)
+            if signature is None or stored.get(str(filial)) != signature:
+                changed.append(filial)
+        return changed
+
+    def _ensure_table(self, con, columns):
+        value_columns = [column for column in columns if column not in KEY_COLUMNS]
+        definitions = [f"{_quote(column)} NOT NULL" for column in KEY_COLUMNS]
+        definitions += [_quote(column) for column in value_columns]
+        definitions.append('"_actualizado" TEXT')
+        con.execute(
+            f'CREATE TABLE IF NOT EXISTS {_quote(self.TABLE)} '
+            f'({", ".join(definitions)}, PRIMARY KEY ({", ".join(_quote(c) for c in KEY_COLUMNS)}))'
+        )
+
+    @staticmethod
+    def _rows(df):
+        """Filas del DataFrame como tuplas de valores nativos de Python"""
+        values = df.astype(object)
+        values = values.where(df.notna(), None)
+        for column in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[column]):
+                values[column] = [value.isoformat() if value is not None else None for value in values[column]]
+        return values.itertuples(index=False, name=None)
+
+    def merge(self, aggregated_df, sources, filiales):
+        """
+        Aplica los grupos recalculados de las filiales indicadas en una
+        sola transacción: upsert de sus grupos, eliminación de los grupos
+        que ya no existen y registro de la firma de sus archivos.
+        """
+        run_id = datetime.now().isoformat(timespec='microseconds')
+        columns = list(aggregated_df.columns)
+        value_columns = [column for column in columns if column not in KEY_COLUMNS]
+        insert_columns = columns + ['_actualizado']
+        sql = (
+            f'INSERT INTO {_quote(self.TABLE)} ({", ".join(_quote(c) for c in insert_columns)}) '
+            f'VALUES ({", ".join("?" for _ in insert_columns)}) '
+            f'ON CONFLICT ({", ".join(_quote(c) for c in KEY_COLUMNS)}) DO UPDATE SET '
+            + ', '.join(f'{_quote(c)} = excluded.{_quote(c)}' for c in value_columns + ['_actualizado'])
+        )
+
+        con = self._connect()
+        try:
+            self._ensure_table(con, columns)
+            con.execute('BEGIN')
+            con.executemany(sql, (row + (run_id,) for row in self._rows(aggregated_df)))
+            for filial in filiales:
+                con.execute(
+                    f'DELETE FROM {_quote(self.TABLE)} WHERE filial = ? AND "_actualizado" <> ?',
+                    (str(filial), run_id)
+                )
+                con.execute(
+                    'INSERT OR REPLACE INTO fuentes (filial, firma, actualizado) VALUES (?, ?, ?)',
+                    (str(filial), self._signature(sources.get(filial)), run_id)
+                )
+            con.execute('COMMIT')
+        except Exception:
+            if con.in_transaction:
+                con.execute('ROLLBACK')
+            raise
+        finally:
+            con.close()
+        logging.info(f"Consolidado histórico actualizado: {len(aggregated_df)} grupos de {len(filiales)} filiales")
+
+    def prune(self, origins, configured):
+        """
+        Registra las fuentes de las filiales de esta ejecución y elimina del
+        estado las filiales que ya no provienen de ninguna fuente configurada.
+
+        Args:
+            origins (dict): filial -> [fuentes de sus archivos en esta ejecución]
+            configured (set): Fuentes configuradas actualmente
+
+        Returns:
+            list: Filiales eliminadas
+        """
+        current = {str(filial): set(sources) for filial, sources in origins.items()}
+        claimed = set().union(*current.values())
+        removed = []
+
+        con = self._connect()
+        try:
+            stored = con.execute('SELECT filial, origenes FROM fuentes').fetchall()
+            con.execute('BEGIN')
+            for filial, stored_origins in stored:
+                if filial in current:
+                    remaining = current[filial]
+                else:
+                    # Las fuentes que esta ejecución asignó a otra filial dejan de pertenecer a esta
+                    remaining = set(json.loads(stored_origins or '[]')) - claimed
+                    if not remaining & configured:
+                        con.execute(f'DELETE FROM {_quote(self.TABLE)} WHERE filial = ?', (filial,))
+                        con.execute('DELETE FROM fuentes WHERE filial = ?', (filial,))
+                        removed.append(filial)
+                        continue
+                con.execute('UPDATE fuentes SET origenes = ? WHERE filial = ?',
+                            (json.dumps(sorted(remaining), ensure_ascii=False), filial))
+            con.execute('COMMIT')
+        except Exception:
+            if con.in_transaction:
+                con.execute('ROLLBACK')
+            raise
+        finally:
+            con.close()
+        if removed:
+            logging.info(f"Filiales eliminadas del consolidado histórico (sin fuentes configuradas): {', '.join(removed)}")
+        return removed
+
+    def load(self, columns):
+        """
+        Lee el consolidado completo ordenado por las columnas clave.
+
+        Args:
+            columns (list): Columnas del consolidado en el orden de salida
+        """
+        con = self._connect()
+        try:
+            exists = con.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.TABLE,)
+            ).fetchone()
+            if not exists:
+                return pd.DataFrame(columns=columns)
+            df = pd.read_sql_query(
+                f'SELECT {", ".join(_quote(c) for c in columns)} FROM {_quote(self.TABLE)} '
+                f'ORDER BY {", ".join(_quote(c) for c in KEY_COLUMNS)}',
+                con
+            )
+        finally:
+            con.close()
+        return apply_schema(df, field_dtypes())
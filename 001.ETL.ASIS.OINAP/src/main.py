@@ -10,9 +10,11 @@ import logging
 import os
 from datetime import datetime
 from config_loader import config
-from extract.extract import ExcelDownloader
-from transform.transform import ExcelProcessor
-from load.load import ExcelWriter
+from metrics import metrics
+
+# Los módulos de cada fase (pandas, openpyxl, requests, pyarrow...) se
+# importan dentro de main(), recién en la fase que los necesita, para que
+# importar este módulo (p. ej. desde cli.py) sea inmediato.
 
 def setup_logging():
     """
@@ -36,43 +38,169 @@ def setup_logging():
     )
     return logging.getLogger()
 
-def main():
+def extract_and_transform(logger, downloader, checkpoints, resume=False):
+    """
+    FASE 1 (descarga y extracción) y FASE 2 (transformación) según el modo
+    configurado. Guarda el punto de control de cada fase y, si se reanuda
+    una ejecución, omite las fases (y los archivos) ya completados.
+
+    Returns:
+        dict: Datos transformados, o None si ninguna fuente cambió
+    """
+    if config.pipeline['enabled'] and not checkpoints.completed('download'):
+        # Modo pipeline: cada archivo se procesa apenas termina su descarga
+        # mientras las demás descargas continúan (FASE 1 + FASE 2)
+        with metrics.phase('pipeline'):
+            from pipeline.pipeline import StreamingPipeline
+            pipeline = StreamingPipeline(downloader)
+            transformed_data = pipeline.run(config.excel_urls)
+        if downloader.all_unchanged:
+            return None
+        checkpoints.save_download(pipeline.downloaded_files(), downloader.manifest)
+        logger.info("Extracción y transformación de datos completadas")
+        return transformed_data
+
+    # FASE 1: EXTRACCIÓN
+    # Descarga los archivos Excel desde las URLs configuradas
+    # y los guarda en el directorio de descargas
+    if checkpoints.completed('download'):
+        downloaded_files = checkpoints.restore_download(downloader)
+        logger.info(f"Se reutilizan los {len(downloaded_files)} archivos descargados por la ejecución")
+    else:
+        with metrics.phase('download'):
+            # Al reanudar se procesa aunque las fuentes no hayan cambiado: la
+            # ejecución original no llegó a generar su salida con ellas
+            downloaded_files = downloader.prepare_files(config.excel_urls, skip_unchanged=False if resume else None)
+        if downloader.all_unchanged:
+            return None
+        checkpoints.save_download(downloaded_files, downloader.manifest)
+
+    if config.processing['mode'] == 'process':
+        # Modo paralelo: la lectura y transformación de cada archivo
+        # se ejecutan juntas en un pool de procesos (FASE 1 + FASE 2)
+        with metrics.phase('extract_transform'):
+            from transform.parallel import ParallelProcessor
+            transformed_data = ParallelProcessor().process_files(downloaded_files, downloader)
+        logger.info("Extracción y transformación de datos completadas")
+        return transformed_data
+
+    with metrics.phase('extract'):
+        extracted_data = downloader.process_files(downloaded_files, checkpoints)
+    checkpoints.complete('extract', files=len(extracted_data))
+    logger.info(f"Archivos procesados: {len(extracted_data)}")
+
+    # FASE 2: TRANSFORMACIÓN
+    # Procesa los datos extraídos aplicando reglas de negocio
+    # y preparándolos para la consolidación
+    with metrics.phase('transform'):
+        from transform.transform import ExcelProcessor
+        processor = ExcelProcessor(downloader.partitions)
+        transformed_data = processor.process_files(extracted_data)
+    logger.info("Transformación de datos completada")
+    return transformed_data
+
+def main(resume=None):
     """
     Función principal que ejecuta el proceso ETL completo.
     Coordina las tres fases del proceso y maneja los errores que puedan surgir.
+    Al terminar registra las métricas de la ejecución (ver metrics.py).
+
+    Args:
+        resume (str): Identificador de una ejecución anterior
+            ('execution_<timestamp>') que se retoma desde su primera fase
+            incompleta (ver checkpoints.py)
     """
     # Inicialización del sistema de logs
     logger = setup_logging()
     logger.info("Iniciando proceso ETL")
+    metrics.start(trace_memory=config.metrics['enabled'] and config.metrics['tracemalloc'])
+    status = 'error'
+    downloader = None
+    checkpoints = None
 
     try:
-        # FASE 1: EXTRACCIÓN
-        # Descarga los archivos Excel desde las URLs configuradas
-        # y los guarda en el directorio de descargas
-        downloader = ExcelDownloader(config.data_dir)
-        extracted_data = downloader.process_urls(config.excel_urls)
-        logger.info(f"Archivos procesados: {len(extracted_data)}")
-    
-        # FASE 2: TRANSFORMACIÓN
-        # Procesa los datos extraídos aplicando reglas de negocio
-        # y preparándolos para la consolidación
-        processor = ExcelProcessor()
-        transformed_data = processor.process_files(extracted_data)
-        logger.info("Transformación de datos completada")
+        # (el tiempo de importar cada módulo se cuenta en la fase que lo usa)
+        with metrics.phase('setup'):
+            from extract.extract import ExcelDownloader
+            from checkpoints import CheckpointStore, execution_folder
+            if resume:
+                checkpoints = CheckpointStore(execution_folder(resume))
+                if not checkpoints.exists():
+                    logger.error(f"La ejecución {resume} no tiene puntos de control en {checkpoints.execution_folder}")
+                    return
+                downloader = ExcelDownloader(config.data_dir, os.path.basename(checkpoints.execution_folder))
+            else:
+                downloader = ExcelDownloader(config.data_dir)
+                checkpoints = CheckpointStore(downloader.downloads_folder)
+
+        if resume:
+            phase = checkpoints.first_incomplete()
+            if phase is None:
+                logger.info(f"La ejecución {resume} ya se completó; no hay nada que reanudar")
+                status = 'success'
+                return
+            logger.info(f"Reanudando la ejecución {resume} desde la fase {phase}")
+
+        # Al reanudar después de la transformación, solo falta la carga
+        transformed_data = None
+        if checkpoints.completed('transform'):
+            with metrics.phase('resume'):
+                transformed_data = checkpoints.load_transformed()
+        if transformed_data is None:
+            transformed_data = extract_and_transform(logger, downloader, checkpoints, bool(resume))
+            if transformed_data is None:
+                logger.info("Proceso ETL finalizado sin cambios en las fuentes")
+                status = 'unchanged'
+                return
+            with metrics.phase('checkpoint'):
+                checkpoints.save_transformed(transformed_data)
 
         # FASE 3: CARGA
         # Consolida todos los datos transformados en un único archivo Excel
         # con el formato final requerido
-        writer = ExcelWriter(config.summary_dir)
-        success = writer.update_consolidated(transformed_data)
+        with metrics.phase('load'):
+            from load.load import ExcelWriter
+            writer = ExcelWriter(config.summary_dir)
+            success = writer.update_consolidated(transformed_data)
         
         if success:
+            checkpoints.complete('load')
+            # Recién ahora las fuentes quedan registradas como procesadas
+            downloader.commit_index()
             logger.info("Proceso ETL completado exitosamente")
+            status = 'success'
         else:
             logger.error("Error durante la carga de datos")
+            status = 'load_failed'
 
     except Exception as e:
         logger.error(f"Error en el proceso ETL: {e}")
+    finally:
+        if status in ('error', 'load_failed') and checkpoints is not None and checkpoints.exists():
+            execution_id = os.path.basename(checkpoints.execution_folder)
+            logger.info(f"Para reanudar desde la fase {checkpoints.first_incomplete()}: "
+                        f"python src/cli.py run --resume {execution_id}")
+        if config.metrics['enabled']:
+            write_metrics(logger, downloader, status, bool(resume))
+
+def write_metrics(logger, downloader, status, resumed=False):
+    """
+    Escribe las métricas de la ejecución en el directorio de resumen.
+    La ejecución se identifica con el nombre de su carpeta de descargas; una
+    ejecución reanudada agrega '_resume_<timestamp>' para no sobrescribir
+    las métricas de la ejecución original.
+    """
+    if downloader is not None:
+        execution_id = os.path.basename(downloader.downloads_folder)
+        if resumed:
+            execution_id = f"{execution_id}_resume_{datetime.now().strftime(config.formats['timestamp'])}"
+    else:
+        execution_id = f"execution_{datetime.now().strftime(config.formats['timestamp'])}"
+    try:
+        path = metrics.write(config.summary_dir, execution_id, status, config.metrics['history_file'])
+        logger.info(f"Métricas de la ejecución guardadas en: {path}")
+    except Exception as e:
+        logger.warning(f"No se pudieron guardar las métricas de la ejecución: {e}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
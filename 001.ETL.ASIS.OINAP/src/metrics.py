@@ -0,0 +1,310 @@
+"""
+Métricas de ejecución
+Este módulo registra, para cada ejecución del ETL, métricas legibles por
+máquina que permiten saber en qué se fue el tiempo de una ejecución lenta:
+- Por fase (download, extract, transform, load...): tiempo de reloj, tiempo
+  de CPU (incluidos los procesos trabajadores), RSS máximo y pico de
+  tracemalloc
+- Por archivo y fase: tiempo de reloj y de CPU, bytes, filas de entrada y
+  salida y origen de los datos (lectura o partición reutilizada)
+- Contadores: bytes descargados, filas excluidas, aciertos y fallos de
+  cada caché (índice de descargas, caché de lectura, particiones)
+
+Al terminar, main.py escribe el documento en data/summary/metrics_<ejecución>.json
+y lo agrega como una línea a data/summary/metrics.jsonl (historial), que
+'python src/cli.py compare-runs' usa para comparar las últimas ejecuciones.
+
+Configuración ('metrics'): enabled, tracemalloc, history_file.
+tracemalloc está desactivado por defecto: rastrear cada asignación hace que
+la lectura de los Excel (openpyxl) sea varias veces más lenta, así que solo
+conviene activarlo para investigar el consumo de memoria.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+# Importaciones opcionales con manejo de errores
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Nombres de las cachés cuyos contadores '<caché>.hits' / '<caché>.misses' se reportan
+CACHES = ('download_index', 'parsed_cache', 'partitions')
+
+
+def _mb(value):
+    return round(value / (1024 * 1024), 2) if value is not None else None
+
+
+def peak_rss_mb(children=False):
+    """
+    RSS máximo del proceso (o del mayor proceso hijo terminado) en MB,
+    o None si la plataforma no lo informa.
+    """
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+        # ru_maxrss está en KB en Linux y en bytes en macOS
+        return _mb(usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024)
+    if children:
+        return None
+    try:
+        import psutil
+        return _mb(getattr(psutil.Process().memory_info(), 'peak_wset', None))
+    except ImportError:
+        return None
+
+
+def _children_cpu():
+    """Tiempo de CPU de los procesos hijos ya terminados (pool de procesos)"""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class RunMetrics:
+    """
+    Colector de métricas de la ejecución actual. Es seguro para usarse
+    desde varios hilos; los procesos trabajadores envían sus métricas al
+    proceso principal dentro de su resultado (pop_worker / merge).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.owner_pid = None
+        self.reset()
+
+    def reset(self):
+        self._pid = os.getpid()
+        self.started = None
+        self.phases = {}
+        self.files = []
+        self.counters = {}
+        self.rows = {}
+
+    def _claim(self):
+        """
+        Descarta los datos heredados del proceso principal (fork) la primera
+        vez que un proceso trabajador registra algo. Se llama con el lock tomado.
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self.phases, self.files, self.counters, self.rows = {}, [], {}, {}
+
+    def start(self, trace_memory=False):
+        """Inicia la medición de la ejecución en el proceso principal"""
+        self.reset()
+        self.owner_pid = os.getpid()
+        self.started = (datetime.now(), time.perf_counter(), time.process_time(), _children_cpu())
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def count(self, name, amount=1):
+        """Suma 'amount' al contador 'name'"""
+        with self._lock:
+            self._claim()
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_rows(self, stage, rows_in, rows_out):
+        """Filas de entrada y salida de una fase que no se mide por archivo"""
+        with self._lock:
+            self._claim()
+            rows = self.rows.setdefault(stage, {'in': 0, 'out': 0})
+            rows['in'] += rows_in
+            rows['out'] += rows_out
+
+    @contextmanager
+    def phase(self, name):
+        """Mide una fase completa del proceso principal"""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        wall, cpu, children = time.perf_counter(), time.process_time(), _children_cpu()
+        try:
+            yield
+        finally:
+            record = {
+                'wall_s': round(time.perf_counter() - wall, 4),
+                'cpu_s': round(time.process_time() - cpu + _children_cpu() - children, 4),
+                'peak_rss_mb': peak_rss_mb(),
+                'tracemalloc_peak_mb': _mb(tracemalloc.get_traced_memory()[1]) if tracing else None
+            }
+            with self._lock:
+                self.phases[name] = record
+
+    @contextmanager
+    def file(self, phase, name):
+        """
+        Mide el trabajo de una fase sobre un archivo (o destino). El
+        llamador puede completar el registro que se entrega (rows_in,
+        rows_out, bytes, filial, source...). El tiempo de CPU es el del
+        hilo actual.
+        """
+        record = {'phase': phase, 'file': name}
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield record
+        finally:
+            record['wall_s'] = round(time.perf_counter() - wall, 4)
+            record['cpu_s'] = round(time.thread_time() - cpu, 4)
+            with self._lock:
+                self._claim()
+                self.files.append(record)
+
+    def record_file(self, phase, name, **values):
+        """Registra un archivo sin medir tiempos (p. ej. una partición reutilizada)"""
+        record = dict(values, phase=phase, file=name)
+        with self._lock:
+            self._claim()
+            self.files.append(record)
+
+    def pop_worker(self):
+        """
+        En un proceso trabajador, retorna sus métricas y las reinicia para
+        que el proceso principal las agregue con merge(). En el proceso
+        principal (p. ej. el pipeline con un hilo de procesamiento) retorna
+        None: las métricas ya están en este colector.
+        """
+        if os.getpid() == self.owner_pid:
+            return None
+        with self._lock:
+            self._claim()
+            data = {'files': self.files, 'counters': self.counters, 'rows': self.rows}
+            self.files, self.counters, self.rows = [], {}, {}
+        return data
+
+    def merge(self, data):
+        """Agrega las métricas enviadas por un proceso trabajador"""
+        if not data:
+            return
+        with self._lock:
+            self.files.extend(data['files'])
+            for name, amount in data['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+        for stage, rows in data['rows'].items():
+            self.add_rows(stage, rows['in'], rows['out'])
+
+    def report(self, execution_id, status):
+        """Documento de métricas de la ejecución"""
+        started_at, wall, cpu, children = self.started or (datetime.now(), time.perf_counter(), time.process_time(), _children_cpu())
+        with self._lock:
+            files = list(self.files)
+            counters = dict(self.counters)
+            rows = {stage: dict(values) for stage, values in self.rows.items()}
+            phases = dict(self.phases)
+
+        # Filas por fase: registros por archivo más las fases medidas en bloque
+        for record in files:
+            if 'rows_in' not in record and 'rows_out' not in record:
+                continue
+            stage = rows.setdefault(record['phase'], {'in': 0, 'out': 0})
+            stage['in'] += record.get('rows_in', 0)
+            stage['out'] += record.get('rows_out', 0)
+
+        caches = {}
+        for cache in CACHES:
+            hits = counters.get(f'{cache}.hits', 0)
+            misses = counters.get(f'{cache}.misses', 0)
+            if hits or misses:
+                caches[cache] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / (hits + misses), 4)}
+
+        return {
+            'execution_id': execution_id,
+            'status': status,
+            'started': started_at.isoformat(timespec='seconds'),
+            'wall_s': round(time.perf_counter() - wall, 4),
+            'cpu_s': round(time.process_time() - cpu + _children_cpu() - children, 4),
+            'peak_rss_mb': peak_rss_mb(),
+            'peak_rss_children_mb': peak_rss_mb(children=True),
+            'tracemalloc_peak_mb': _mb(tracemalloc.get_traced_memory()[1]) if tracemalloc.is_tracing() else None,
+            'bytes_downloaded': counters.get('download.bytes', 0),
+            'phases': phases,
+            'rows': rows,
+            'caches': caches,
+            'counters': counters,
+            'files': files
+        }
+
+    def write(self, output_dir, execution_id, status, history_file='metrics.jsonl'):
+        """
+        Escribe el documento de la ejecución y lo agrega al historial.
+
+        Returns:
+            str: Ruta del documento escrito
+        """
+        document = self.report(execution_id, status)
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"metrics_{execution_id}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+        with open(os.path.join(output_dir, history_file), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(document, ensure_ascii=False) + '\n')
+        return path
+
+
+# Instancia global del colector de métricas
+metrics = RunMetrics()
+
+
+def load_history(history_path, last=5):
+    """Últimas 'last' ejecuciones registradas en el historial (de la más antigua a la más reciente)"""
+    if not os.path.exists(history_path):
+        return []
+    runs = []
+    with open(history_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                runs.append(json.loads(line))
+            except ValueError:
+                logging.warning(f"Línea inválida en el historial de métricas {history_path}")
+    return runs[-last:] if last > 0 else runs
+
+
+def find_regressions(runs, threshold=0.2, min_seconds=0.05):
+    """
+    Compara la última ejecución con la mediana de las anteriores.
+
+    Returns:
+        list: Tuplas (métrica, valor anterior (mediana), valor actual) de
+        las métricas que crecieron más que 'threshold'
+    """
+    if len(runs) < 2:
+        return []
+    latest, previous = runs[-1], runs[:-1]
+
+    def median(values):
+        values = sorted(values)
+        middle = len(values) // 2
+        return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+    compared_metrics = {'wall_s': lambda run: run.get('wall_s'), 'peak_rss_mb': lambda run: run.get('peak_rss_mb')}
+    for phase in latest.get('phases', {}):
+        compared_metrics[f'{phase}.wall_s'] = lambda run, phase=phase: run.get('phases', {}).get(phase, {}).get('wall_s')
+
+    regressions = []
+    for name, value_of in compared_metrics.items():
+        current = value_of(latest)
+        history = [value for value in map(value_of, previous) if value is not None]
+        if current is None or not history:
+            continue
+        baseline = median(history)
+        # Las fases muy cortas se ignoran: su variación es ruido
+        if name.endswith('wall_s') and max(current, baseline) < min_seconds:
+            continue
+        if baseline > 0 and (current - baseline) / baseline > threshold:
+            regressions.append((name, baseline, current))
+    return regressions
@@ -0,0 +1,180 @@
+"""
+Módulo de Pipeline (Extract + Transform en streaming)
+Este módulo superpone la descarga de archivos con su procesamiento:
+- Cada archivo se lee y transforma apenas termina su descarga
+- Las demás descargas continúan en paralelo, de modo que la latencia total
+  se aproxima a max(descarga, procesamiento) en lugar de su suma
+- Los lotes transformados se acumulan por archivo; la carga empieza recién
+  cuando el pipeline entrega el lote completo, así que la memoria crece con
+  el total de registros (igual que en los modos serial y paralelo)
+
+El pipeline abarca solo la extracción y la transformación: no hay una cola
+hacia la carga ni control de flujo entre ambas, porque la carga agrega,
+fusiona con el consolidado histórico y depura filiales sobre el conjunto
+completo de lotes (ver load.load.ExcelWriter.update_consolidated).
+"""
+
+import os
+import sys
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+# Añadir el directorio src al path de Python de forma dinámica
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from config_loader import config
+from extract.sources import resolve_sources, source_key
+from transform.parallel import ParallelProcessor, process_workbook, result_to_dataframe
+from transform.transform import build_transformed_data
+from metrics import metrics
+
+
+class StreamingPipeline:
+    """
+    Pipeline que coordina descarga, procesamiento y acumulación de lotes
+    transformados; entrega el lote completo a main.py para la carga.
+    """
+
+    def __init__(self, downloader):
+        """
+        Args:
+            downloader (ExcelDownloader): Descargador de la ejecución actual
+        """
+        self.downloader = downloader
+        self.parallel = ParallelProcessor()
+        # Archivo descargado de cada fuente (unique_id -> ruta, con su nombre final)
+        self.file_paths = {}
+
+    def _create_parse_executor(self):
+        """
+        Crea el ejecutor de procesamiento: un pool de procesos en modo 'process'
+        o un único hilo en modo 'serial' (que igual se superpone con la red).
+        """
+        if config.processing['mode'] == 'process':
+            return ProcessPoolExecutor(max_workers=self.parallel.max_workers)
+        return ThreadPoolExecutor(max_workers=1)
+
+    def downloaded_files(self):
+        """Pares (unique_id, ruta) de los archivos descargados, en el orden de las fuentes"""
+        return sorted(self.file_paths.items())
+
+    def run(self, urls):
+        """
+        Ejecuta el pipeline completo sobre las URLs configuradas.
+
+        Returns:
+            dict: Diccionario con las filiales procesadas y el DataFrame de
+            registros (vacío si ninguna fuente cambió)
+        """
+        start_time = time.perf_counter()
+        urls = resolve_sources(urls, config.paths['project_root'])
+        self.downloader.sources = [source_key(url) for url in urls]
+        # Lotes transformados (recalculados o tomados de su partición) por archivo
+        collected = {}
+
+        max_downloads = max(1, int(config.download['max_concurrent_downloads']))
+        deferred = []      # Archivos sin cambios: solo se procesan si alguna otra fuente cambió
+        downloads_done = 0
+        changed = 0
+        processed = 0
+
+        download_executor = ThreadPoolExecutor(max_workers=max_downloads)
+        parse_executor = self._create_parse_executor()
+        try:
+            download_futures = {
+                download_executor.submit(self.downloader._download_task, url, idx): idx
+                for idx, url in enumerate(urls, start=1)
+            }
+            parse_futures = {}
+            pending = set(download_futures)
+
+            def submit_parse(file_path, unique_id):
+                nonlocal processed
+                # Si el contenido ya tiene partición transformada, no se procesa de nuevo
+                sha256 = self.downloader.file_sha256(file_path, unique_id)
+                partition = self.downloader.partitions.get(sha256)
+                if partition:
+                    filial, df = partition
+                    logging.info(f"Filial {filial} sin cambios, se reutiliza su partición transformada")
+                    metrics.record_file('extract_transform', os.path.basename(file_path), filial=filial,
+                                        source='partition', rows_out=len(df))
+                    self.file_paths[unique_id] = self.downloader.rename_file(file_path, filial, unique_id)
+                    processed += 1
+                    collected[unique_id] = (filial, df, sha256, self.downloader.file_source(unique_id))
+                    return
+                try:
+                    future = parse_executor.submit(process_workbook, file_path, sha256)
+                except BrokenProcessPool:
+                    # El pool quedó inutilizable: se procesa el archivo de forma aislada
+                    future = download_executor.submit(self.parallel._run_isolated, file_path, sha256)
+                parse_futures[future] = (unique_id, file_path, sha256)
+                pending.add(future)
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in download_futures:
+                        downloads_done += 1
+                        unique_id = download_futures[future]
+                        file_path = future.result()
+                        if not file_path:
+                            logging.error(f"No se pudo descargar el archivo de: {urls[unique_id - 1]}")
+                        else:
+                            self.file_paths[unique_id] = file_path
+                            if file_path in self.downloader.unchanged_files:
+                                deferred.append((file_path, unique_id))
+                            else:
+                                changed += 1
+                                submit_parse(file_path, unique_id)
+
+                        # Al terminar todas las descargas se decide qué hacer con los archivos sin cambios
+                        if downloads_done == len(download_futures):
+                            if (changed == 0 and deferred and config.download['skip_unchanged']
+                                    and not self.downloader.download_index.removed(self.downloader.sources)):
+                                self.downloader.all_unchanged = True
+                                logging.info("Ninguna fuente cambió desde la última ejecución; se omite el procesamiento")
+                                self.downloader.discard_execution()
+                            else:
+                                for file_path, deferred_id in deferred:
+                                    submit_parse(file_path, deferred_id)
+                    else:
+                        unique_id, file_path, sha256 = parse_futures.pop(future)
+                        try:
+                            result = future.result()
+                        except BrokenProcessPool:
+                            result = self.parallel._run_isolated(file_path, sha256)
+                        except Exception as e:
+                            logging.error(f"Error al procesar {file_path}: {e}")
+                            result = None
+
+                        if not result:
+                            logging.error(f"No se pudo extraer datos del archivo {file_path}")
+                            continue
+                        df = result_to_dataframe(result)
+                        self.parallel.rules.merge_stats(result.get('rules'))
+                        metrics.merge(result.get('metrics'))
+                        self.downloader.partitions.put(sha256, self.downloader.file_source(unique_id),
+                                                       result['filial'], df)
+                        self.file_paths[unique_id] = self.downloader.rename_file(file_path, result['filial'], unique_id)
+                        processed += 1
+                        collected[unique_id] = (result['filial'], df, sha256, self.downloader.file_source(unique_id))
+        finally:
+            download_executor.shutdown(wait=True)
+            parse_executor.shutdown(wait=True)
+            if not self.downloader.all_unchanged:
+                self.downloader.finalize()
+
+        elapsed = time.perf_counter() - start_time
+        logging.info(f"Pipeline completado: {processed}/{len(urls)} archivos procesados en {elapsed:.2f}s")
+        if self.downloader.all_unchanged:
+            return {}
+        # Se conserva el orden de unique_id independientemente del orden de llegada
+        transformed_data = build_transformed_data([collected[unique_id] for unique_id in sorted(collected)])
+        self.parallel.rules.log_stats()
+        logging.info(f"Transformación completada. {len(transformed_data['dataframe'])} registros procesados de {len(transformed_data['filiales'])} filiales")
+        return transformed_data
@@ -0,0 +1,61 @@
+"""
+Esquema de los registros OINAP
+Este módulo asigna tipos de datos compactos a las columnas según
+'excel.structure.columns' (clave 'dtype' de cada columna):
+- "category": columnas de baja cardinalidad (mes, día, grupo, tipo...)
+- "date": fechas (datetime64)
+La columna 'filial' siempre es categórica. Los tipos se asignan al leer
+el archivo y se vuelven a aplicar después de concatenar lotes, ya que
+pandas convierte a object las categorías que no coinciden.
+"""
+
+import logging
+import pandas as pd
+
+from config_loader import config
+
+DTYPE_CATEGORY = 'category'
+DTYPE_DATE = 'date'
+
+
+def field_dtypes():
+    """Tipos por nombre de campo ('mes', 'grupo', ...), incluida la filial"""
+    dtypes = {column.field: column.dtype for column in config.excel_spec.columns if column.dtype}
+    dtypes['filial'] = DTYPE_CATEGORY
+    return dtypes
+
+
+def source_dtypes():
+    """Tipos por nombre de columna en el Excel ('expected_name')"""
+    return {column.expected_name: column.dtype for column in config.excel_spec.columns if column.dtype}
+
+
+def apply_schema(df, dtypes):
+    """
+    Convierte las columnas del DataFrame a los tipos indicados.
+    Las columnas ausentes se ignoran; las que ya tienen el tipo no se copian.
+
+    Args:
+        df (DataFrame): DataFrame a convertir (se modifica y se retorna)
+        dtypes (dict): Nombre de columna -> "category" | "date"
+
+    Returns:
+        DataFrame: El mismo DataFrame con los tipos asignados
+    """
+    for column, dtype in dtypes.items():
+        if column not in df.columns:
+            continue
+        series = df[column]
+        if dtype == DTYPE_CATEGORY:
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                df[column] = series.astype('category')
+        elif dtype == DTYPE_DATE:
+            if not pd.api.types.is_datetime64_any_dtype(series):
+                converted = pd.to_datetime(series, errors='coerce')
+                lost = int((converted.isna() & series.notna()).sum())
+                if lost:
+                    logging.warning(f"{lost} valores de '{column}' no son fechas válidas y se dejan vacíos")
+                df[column] = converted
+        else:
+            logging.warning(f"Tipo de columna no soportado para '{column}': {dtype}")
+    return df
@@ -0,0 +1,212 @@
+"""
+Módulo de Procesamiento Paralelo
+Este módulo ejecuta la extracción y transformación de cada archivo Excel
+en un pool de procesos, aprovechando todos los núcleos disponibles.
+Cada proceso trabajador retorna un resultado columnar compacto
+(una Serie tipada por columna, sin la filial repetida en cada fila).
+"""
+
+import os
+import sys
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+# Añadir el directorio src al path de Python de forma dinámica
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from config_loader import config
+from extract.extract import WorkbookReader
+from extract.parsed_cache import ParsedCache
+from transform.transform import ExcelProcessor, build_transformed_data
+from transform.rules import RuleEngine
+from metrics import metrics
+import pandas as pd
+
+# Objetos del proceso trabajador, creados una sola vez por proceso: el
+# procesador (reglas compiladas), la caché de lectura (que al crearse
+# recorre su directorio) y el lector de libros
+_processor = None
+_cache = None
+_reader = None
+
+
+def _init_worker():
+    """Crea los objetos del proceso trabajador si todavía no existen"""
+    global _processor, _cache, _reader
+    if _processor is None:
+        _processor = ExcelProcessor()
+        _cache = ParsedCache()
+        _reader = WorkbookReader()
+
+
+def result_to_dataframe(result):
+    """Reconstruye el DataFrame transformado a partir del resultado columnar de un proceso"""
+    df = pd.DataFrame(result['columns'])
+    df['filial'] = pd.Categorical([result['filial']] * len(df), categories=[result['filial']])
+    return df
+
+
+def process_workbook(file_path, sha256=None):
+    """
+    Función ejecutada en cada proceso trabajador: lee y transforma un archivo.
+    'sha256' (del manifiesto de la ejecución) evita volver a calcular el hash
+    para consultar la caché de lectura.
+
+    Returns:
+        dict: {'filial', 'rows', 'columns': {columna: Serie}, 'rules': estadísticas
+        de las reglas, 'metrics': métricas del proceso trabajador} o None si el
+        archivo no es válido
+    """
+    _init_worker()
+
+    with metrics.file('extract_transform', os.path.basename(file_path)) as record:
+        data = _cache.read(file_path, _reader, sha256)
+        if not data:
+            return None
+
+        result = _processor.transform_dataframe(data['dataframe'], data['filial'], data.get('excluded'))
+        if not result:
+            return None
+        record.update(filial=result['filial'], source='read', rows_in=len(data['dataframe']),
+                      rows_out=len(result['dataframe']))
+
+    # La filial es constante por archivo, se envía una sola vez como metadato
+    df = result['dataframe']
+    return {
+        'filial': result['filial'],
+        'rows': len(df),
+        'columns': {column: df[column] for column in df.columns if column != 'filial'},
+        'rules': _processor.rules.pop_stats(),
+        'metrics': metrics.pop_worker()
+    }
+
+
+class ParallelProcessor:
+    """
+    Ejecuta la extracción y transformación de archivos en un pool de procesos.
+    La falla de un archivo (incluso la caída de un proceso) no detiene la ejecución.
+    """
+
+    def __init__(self, max_workers=None):
+        """
+        Inicializa el procesador con la cantidad de procesos trabajadores.
+        Si no se indica, se usa 'processing.max_workers' (0 = un proceso por núcleo).
+        """
+        if max_workers is None:
+            max_workers = config.processing['max_workers']
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Acumula las estadísticas de reglas reportadas por los procesos trabajadores
+        self.rules = RuleEngine()
+
+    def _run_isolated(self, file_path, sha256=None):
+        """
+        Procesa un archivo en un proceso dedicado, para que una caída
+        solo afecte a ese archivo.
+        """
+        try:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                return executor.submit(process_workbook, file_path, sha256).result()
+        except Exception as e:
+            logging.error(f"Error al procesar {file_path} en proceso aislado: {e}")
+            return None
+
+    def run(self, file_paths, shas=None):
+        """
+        Procesa todos los archivos en paralelo.
+
+        Args:
+            file_paths (list): Rutas de los archivos
+            shas (list): SHA-256 de cada archivo, si ya se conocen
+
+        Returns:
+            list: Resultados columnares en el mismo orden que file_paths
+            (None para los archivos que fallaron)
+        """
+        results = [None] * len(file_paths)
+        shas = shas or [None] * len(file_paths)
+        completed = set()
+        workers = min(self.max_workers, len(file_paths)) or 1
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(process_workbook, path, shas[idx]): idx
+                           for idx, path in enumerate(file_paths)}
+                for future in as_completed(futures):
+                    idx = futures[future]
+                    try:
+                        results[idx] = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        logging.error(f"Error al procesar {file_paths[idx]}: {e}")
+                    completed.add(idx)
+        except BrokenProcessPool:
+            # Un proceso terminó abruptamente: se reintentan los pendientes uno por uno
+            logging.error("Un proceso trabajador terminó abruptamente; se reintentan los archivos pendientes de forma aislada")
+            for idx, path in enumerate(file_paths):
+                if idx not in completed:
+                    results[idx] = self._run_isolated(path, shas[idx])
+
+        return results
+
+    def process_files(self, downloaded_files, downloader=None):
+        """
+        Extrae y transforma todos los archivos en paralelo y genera el mismo
+        conjunto consolidado que ExcelProcessor.process_files.
+
+        Args:
+            downloaded_files (list): Pares (unique_id, ruta) de los archivos descargados
+            downloader (ExcelDownloader): Si se indica, renombra los archivos según su filial
+
+        Returns:
+            dict: Diccionario con las filiales procesadas y el DataFrame de registros
+        """
+        # Los archivos con partición transformada vigente no se vuelven a procesar
+        shas = {}
+        cached = {}
+        pending = []
+        for idx, file_path in downloaded_files:
+            if downloader:
+                shas[idx] = downloader.file_sha256(file_path, idx)
+                partition = downloader.partitions.get(shas[idx])
+                if partition:
+                    cached[idx] = partition
+                    metrics.record_file('extract_transform', os.path.basename(file_path), filial=partition[0],
+                                        source='partition', rows_out=len(partition[1]))
+                    continue
+            pending.append((idx, file_path))
+
+        logging.info(f"Procesando {len(pending)} archivos con {self.max_workers} procesos ({len(cached)} particiones reutilizadas)")
+        results = self.run([path for _, path in pending], [shas.get(idx) for idx, _ in pending])
+        results = dict(zip([idx for idx, _ in pending], results))
+
+        batches = []
+        for idx, file_path in downloaded_files:
+            if idx in cached:
+                filial, df = cached[idx]
+            else:
+                result = results[idx]
+                if not result:
+                    logging.error(f"No se pudo extraer datos del archivo {file_path}")
+                    continue
+                filial, df = result['filial'], result_to_dataframe(result)
+                self.rules.merge_stats(result.get('rules'))
+                metrics.merge(result.get('metrics'))
+                if downloader:
+                    downloader.partitions.put(shas[idx], downloader.file_source(idx), filial, df)
+
+            if downloader:
+                downloader.rename_file(file_path, filial, idx)
+            batches.append((filial, df, shas.get(idx), downloader.file_source(idx) if downloader else None))
+
+        if downloader:
+            downloader.finalize()
+
+        transformed_data = build_transformed_data(batches)
+        self.rules.log_stats()
+        logging.info(f"Transformación completada. {len(transformed_data['dataframe'])} registros procesados de {len(transformed_data['filiales'])} filiales")
+        return transformed_data
@@ -0,0 +1,149 @@
+"""
+Particiones transformadas por fuente y filial
+Este módulo guarda en disco el resultado de la transformación de cada
+filial de cada fuente junto con el SHA-256 del archivo de origen (dos
+fuentes con la misma filial tienen particiones distintas). En la siguiente
+ejecución, los archivos cuyo contenido no cambió se toman directamente de
+su partición (sin leerlos ni transformarlos) y solo se recalculan las
+filiales cuyo archivo cambió; luego todas se unen antes de la carga.
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+# Añadir el directorio src al path de Python de forma dinámica
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from config_loader import config
+from extract.parsed_cache import config_fingerprint, read_frame, write_frame
+from schema import apply_schema, field_dtypes
+from metrics import metrics
+
+
+class PartitionStore:
+    """
+    Particiones transformadas, una por fuente y filial, con un índice JSON
+    partición -> {fuente, filial, sha256, huella de configuración, archivo, filas}.
+    Es seguro para ser usado desde varios hilos a la vez.
+    """
+
+    INDEX_NAME = 'partitions.json'
+
+    def __init__(self, partitions_dir=None):
+        settings = config.cache['partitions']
+        self.enabled = settings['enabled']
+        self.use_parquet = settings['format'] == 'parquet'
+        self.partitions_dir = partitions_dir or config.paths['partitions_dir']
+        self.index_path = os.path.join(self.partitions_dir, self.INDEX_NAME)
+        self.fingerprint = config_fingerprint()
+        self._lock = threading.Lock()
+        self._entries = {}
+        if self.enabled:
+            if not os.path.exists(self.partitions_dir):
+                os.makedirs(self.partitions_dir, exist_ok=True)
+            self._entries = self._load()
+
+    def _load(self):
+        """
+        Carga el índice descartando (y eliminando del disco) las particiones
+        generadas con otra configuración o con el formato anterior, que no
+        registraba la fuente.
+        """
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except Exception as e:
+            logging.warning(f"No se pudo leer el índice de particiones {self.index_path}: {e}")
+            return {}
+        valid = {}
+        for key, entry in entries.items():
+            path = entry.get('file', '')
+            if entry.get('fingerprint') == self.fingerprint and 'source' in entry and os.path.exists(path):
+                valid[key] = entry
+            elif path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return valid
+
+    def _save(self):
+        """Guarda el índice de forma atómica (se llama con el candado tomado)"""
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def _key(source, filial):
+        """Nombre de la partición: filial legible + hash corto de la fuente"""
+        slug = re.sub(r'[^\w-]+', '_', str(filial)).strip('_') or 'filial'
+        digest = hashlib.sha1(str(source).encode('utf-8')).hexdigest()[:12]
+        return f"{slug}_{digest}"
+
+    def get(self, sha256):
+        """
+        Retorna (filial, DataFrame transformado) si existe una partición
+        generada a partir de ese contenido, o None en caso contrario.
+        """
+        if not self.enabled or not sha256:
+            return None
+        partition = self._read(sha256)
+        metrics.count('partitions.hits' if partition else 'partitions.misses')
+        return partition
+
+    def _read(self, sha256):
+        with self._lock:
+            entry = next((entry for entry in self._entries.values() if entry['sha256'] == sha256), None)
+            if entry is None:
+                return None
+            filial = entry['filial']
+            base_path = os.path.splitext(entry['file'])[0]
+        try:
+            found = read_frame(base_path)
+        except Exception as e:
+            logging.warning(f"No se pudo leer la partición de {filial}: {e}")
+            return None
+        if found is None:
+            return None
+        _, data = found
+        return filial, apply_schema(data['dataframe'], field_dtypes())
+
+    def put(self, sha256, source, filial, df):
+        """
+        Guarda (o reemplaza) la partición de una filial de una fuente. Si no
+        se conoce la fuente, el propio contenido (sha256) la identifica.
+        """
+        if not self.enabled or not sha256:
+            return
+        source = source or sha256
+        key = self._key(source, filial)
+        try:
+            with self._lock:
+                path = write_frame(os.path.join(self.partitions_dir, key), filial, df, self.use_parquet)
+                previous = self._entries.get(key)
+                if previous and previous['file'] != path and os.path.exists(previous['file']):
+                    os.remove(previous['file'])
+                self._entries[key] = {
+                    'source': source,
+                    'filial': filial,
+                    'sha256': sha256,
+                    'fingerprint': self.fingerprint,
+                    'file': path,
+                    'rows': len(df),
+                    'updated': datetime.now().isoformat(timespec='seconds')
+                }
+                self._save()
+        except Exception as e:
+            logging.warning(f"No se pudo guardar la partición de {filial}: {e}")
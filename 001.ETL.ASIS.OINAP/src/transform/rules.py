@@ -0,0 +1,230 @@
+"""
+Reglas de negocio de la transformación
+Este módulo compila una sola vez la sección 'rules' de config.json en
+operaciones vectorizadas sobre el DataFrame de cada archivo:
+- filters: condiciones que deben cumplir las filas (se combinan en una
+  única máscara booleana)
+- mappings: reemplazo de valores de un campo (o en una columna nueva)
+- derived: columnas calculadas a partir de otras
+
+Las reglas se aplican en ese orden y cada una acumula estadísticas de
+filas de entrada/salida (selectividad) y tiempo de ejecución.
+
+Ejemplo:
+    "rules": {
+        "filters": [
+            {"name": "excluir_preinscritos", "field": "tipoinscrito", "op": "not_in", "values": ["Pre-Inscrito"]}
+        ],
+        "mappings": [
+            {"name": "normalizar_dia", "field": "diaclase", "values": {"Lunes ": "Lunes"}}
+        ],
+        "derived": [
+            {"name": "anio_inicio", "column": "anio", "op": "year", "field": "fechainicio"}
+        ]
+    }
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+
+import pandas as pd
+
+# Añadir el directorio src al path de Python de forma dinámica
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from config_loader import config
+
+# Operadores de filtro: (serie, valor) -> máscara de filas que se conservan
+# (los nombres y sus claves se validan con config_loader.FILTER_OPS)
+FILTER_OPS = {
+    'in': lambda series, value: series.isin(value),
+    'not_in': lambda series, value: ~series.isin(value),
+    'eq': lambda series, value: series == value,
+    'ne': lambda series, value: series != value,
+    'not_null': lambda series, value: series.notna(),
+    'null': lambda series, value: series.isna()
+}
+
+def _as_text(series):
+    """Convierte una columna a texto para concatenarla (vacío en lugar de nulos)"""
+    return series.astype('string').fillna('')
+
+
+# Operadores de columnas derivadas: (DataFrame, regla) -> Serie
+# (los nombres y sus claves se validan con config_loader.DERIVED_OPS)
+DERIVED_OPS = {
+    'constant': lambda df, rule: pd.Series(rule['value'], index=df.index),
+    'copy': lambda df, rule: df[rule['field']].copy(),
+    'concat': lambda df, rule: _concat(df, rule['fields'], rule.get('sep', ' ')),
+    'year': lambda df, rule: df[rule['field']].dt.year,
+    'month': lambda df, rule: df[rule['field']].dt.month
+}
+
+
+def _concat(df, fields, sep):
+    result = _as_text(df[fields[0]])
+    for field in fields[1:]:
+        result = result + sep + _as_text(df[field])
+    return result
+
+
+def _map_values(series, values, default=None):
+    """
+    Reemplaza valores según el diccionario 'values'. En columnas categóricas
+    solo se transforman las categorías, no cada fila.
+    """
+    if default is None:
+        lookup = lambda value: values.get(value, value)
+    else:
+        lookup = lambda value: values.get(value, default)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.map(lookup)
+    if default is None:
+        return series.replace(values)
+    return series.map(values).fillna(default)
+
+
+def pushdown_exclusions(rules=None):
+    """
+    Exclusiones que el lector puede aplicar antes de construir el DataFrame:
+    filtros 'not_in' / 'ne' sobre campos originales (los filtros se
+    evalúan antes que los mapeos, así que siempre ven el valor leído).
+
+    Returns:
+        list: Tuplas (nombre de la regla, campo, valores excluidos) en el
+        orden de los filtros
+    """
+    rules = config.rules if rules is None else rules
+    exclusions = []
+    for rule in rules.get('filters', []):
+        if rule['op'] == 'not_in':
+            exclusions.append((rule['name'], rule['field'], frozenset(rule['values'])))
+        elif rule['op'] == 'ne':
+            exclusions.append((rule['name'], rule['field'], frozenset([rule['value']])))
+    return exclusions
+
+
+class RuleEngine:
+    """
+    Reglas compiladas a partir de la configuración. Se crea una vez y se
+    aplica a cada lote; es seguro para usarse desde varios hilos.
+    """
+
+    def __init__(self, rules=None):
+        rules = config.rules if rules is None else rules
+        self._lock = threading.Lock()
+        self.stats = {}
+        self.filters = [self._compile_filter(rule) for rule in rules.get('filters', [])]
+        self.steps = (
+            [self._compile_mapping(rule) for rule in rules.get('mappings', [])] +
+            [self._compile_derived(rule) for rule in rules.get('derived', [])]
+        )
+
+    @staticmethod
+    def _compile_filter(rule):
+        if rule['op'] not in FILTER_OPS:
+            raise ValueError(f"Operador de filtro no soportado en la regla '{rule['name']}': {rule['op']}")
+        op = FILTER_OPS[rule['op']]
+        field = rule['field']
+        value = rule.get('values', rule.get('value'))
+        return rule['name'], lambda df: op(df[field], value)
+
+    @staticmethod
+    def _compile_mapping(rule):
+        field = rule['field']
+        column = rule.get('column', field)
+        values = rule['values']
+        default = rule.get('default')
+
+        def apply(df):
+            df[column] = _map_values(df[field], values, default)
+            return df
+        return rule['name'], apply
+
+    @staticmethod
+    def _compile_derived(rule):
+        if rule['op'] not in DERIVED_OPS:
+            raise ValueError(f"Operador de columna derivada no soportado en la regla '{rule['name']}': {rule['op']}")
+        op = DERIVED_OPS[rule['op']]
+        column = rule['column']
+
+        def apply(df):
+            df[column] = op(df, rule)
+            return df
+        return rule['name'], apply
+
+    def _record(self, name, rows_in, rows_out, seconds):
+        with self._lock:
+            stats = self.stats.setdefault(name, {'rows_in': 0, 'rows_out': 0, 'seconds': 0.0})
+            stats['rows_in'] += rows_in
+            stats['rows_out'] += rows_out
+            stats['seconds'] += seconds
+
+    def record_pushdown(self, excluded):
+        """
+        Suma a las estadísticas las filas que el lector descartó en origen
+        (ver pushdown_exclusions) y que por lo tanto ya no llegan a apply().
+        Cada fila cuenta como entrada de la regla que la excluyó y como
+        entrada y salida de los filtros anteriores, igual que si los filtros
+        se hubieran evaluado en la transformación.
+
+        Args:
+            excluded (dict): Nombre de la regla -> filas excluidas en la lectura
+        """
+        if not excluded:
+            return
+        names = [name for name, _ in self.filters]
+        for position, name in enumerate(names):
+            dropped = excluded.get(name, 0)
+            passed = sum(excluded.get(later, 0) for later in names[position + 1:])
+            if dropped or passed:
+                self._record(name, dropped + passed, passed, 0.0)
+
+    def apply(self, df):
+        """
+        Aplica todas las reglas al DataFrame (con columnas por nombre de campo).
+
+        Returns:
+            DataFrame: Filas que cumplen los filtros, con mapeos y columnas derivadas
+        """
+        mask = None
+        rows = len(df)
+        for name, condition in self.filters:
+            start = time.perf_counter()
+            mask = condition(df) if mask is None else mask & condition(df)
+            kept = int(mask.sum())
+            self._record(name, rows, kept, time.perf_counter() - start)
+            rows = kept
+
+        result = df if mask is None else df.loc[mask]
+        result = result.reset_index(drop=True)
+
+        for name, step in self.steps:
+            start = time.perf_counter()
+            result = step(result)
+            self._record(name, len(result), len(result), time.perf_counter() - start)
+        return result
+
+    def pop_stats(self):
+        """Retorna las estadísticas acumuladas y las reinicia"""
+        with self._lock:
+            stats, self.stats = self.stats, {}
+        return stats
+
+    def merge_stats(self, stats):
+        """Suma las estadísticas obtenidas en otro proceso"""
+        for name, values in (stats or {}).items():
+            self._record(name, values['rows_in'], values['rows_out'], values['seconds'])
+
+    def log_stats(self):
+        """Registra la selectividad y el tiempo acumulado de cada regla"""
+        for name, stats in self.stats.items():
+            selectivity = stats['rows_out'] / stats['rows_in'] if stats['rows_in'] else 1.0
+            logging.info(f"Regla '{name}': {stats['rows_in']} -> {stats['rows_out']} filas "
+                         f"(selectividad {selectivity:.1%}) en {stats['seconds'] * 1000:.2f} ms")
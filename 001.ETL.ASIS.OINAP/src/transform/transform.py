@@ -16,46 +16,106 @@ if src_dir not in sys.path:
     sys.path.append(src_dir)
 
 from config_loader import config
+from schema import apply_schema, field_dtypes
+from transform.rules import RuleEngine
+from metrics import metrics
 import pandas as pd
 
+def build_transformed_data(batches):
+    """
+    Une los lotes transformados de cada archivo en un único lote columnar.
+    La concatenación se realiza una sola vez, al final.
+
+    Args:
+        batches (list): Tuplas (filial, DataFrame, SHA-256 del archivo de
+            origen, fuente del archivo) en el orden de los archivos
+
+    Returns:
+        dict: {'filiales': [filiales únicas], 'dataframe': DataFrame con todos
+        los registros, 'sources': {filial: [SHA-256 de sus archivos]},
+        'origins': {filial: [fuentes de sus archivos (ver sources.source_key)]}}
+    """
+    filiales = []
+    sources = {}
+    origins = {}
+    for filial, _, sha256, source in batches:
+        if filial not in filiales:
+            filiales.append(filial)
+        sources.setdefault(filial, []).append(sha256)
+        origins.setdefault(filial, [])
+        if source:
+            origins[filial].append(source)
+
+    frames = [df for _, df, _, _ in batches]
+    if frames:
+        dataframe = pd.concat(frames, ignore_index=True)
+    else:
+        dataframe = pd.DataFrame(columns=list(config.excel_spec.fields) + ['filial'])
+    # Las categorías distintas entre archivos se pierden al concatenar
+    apply_schema(dataframe, field_dtypes())
+
+    return {
+        'filiales': filiales,
+        'dataframe': dataframe,
+        'sources': sources,
+        'origins': origins
+    }
+
+
 class ExcelProcessor:
     """
     Clase principal para la transformación de datos.
     Aplica reglas de negocio y realiza la limpieza de datos.
     """
 
-    def transform_dataframe(self, df, filial):
+    def __init__(self, partitions=None):
+        """
+        Args:
+            partitions (PartitionStore): Si se indica, cada filial transformada
+                se guarda como partición para reutilizarla en la siguiente ejecución
+        """
+        self.partitions = partitions
+        self.rules = RuleEngine()
+        self.rename_map = dict(config.excel_spec.rename_map)
+        self.dtypes = field_dtypes()
+
+    def transform_dataframe(self, df, filial, excluded=None):
         """
         Transforma un DataFrame aplicando las reglas de negocio establecidas:
-        - Filtra registros que no son "Pre-Inscrito"
         - Mapea las columnas según la configuración
+        - Aplica las reglas de 'rules' (filtros como "Pre-Inscrito",
+          mapeos de valores y columnas derivadas)
         - Agrega la información de la filial a cada registro
         
+        Todas las operaciones son vectorizadas (máscara booleana, selección
+        y renombrado de columnas), sin recorrer las filas en Python.
+        
         Args:
             df (DataFrame): DataFrame con los datos crudos
             filial (str): Nombre de la filial del archivo
+            excluded (dict): Filas que el lector ya descartó por cada regla,
+                que se suman a las estadísticas de esas reglas
             
         Returns:
-            dict: Diccionario con la filial y los registros procesados
+            dict: Diccionario con la filial y el DataFrame transformado
+            (una columna por campo configurado y derivado, más 'filial')
         """
         try:
-            # Filtrar registros excluyendo "Pre-Inscrito"
-            tipo_inscrito_col = config.excel['structure']['columns']['tipoinscrito']['expected_name']
-            df_filtered = df[df[tipo_inscrito_col] != "Pre-Inscrito"]
-            
-            # Mapear columnas y crear registros procesados
-            registros = []
-            for _, row in df_filtered.iterrows():
-                registro = {}
-                for field, field_config in config.excel['structure']['columns'].items():
-                    registro[field] = row[field_config['expected_name']]
-                # Agregar identificador de filial
-                registro['filial'] = filial
-                registros.append(registro)
-            
+            # Mapear columnas: nombre esperado en el Excel -> nombre del campo
+            result = df[list(self.rename_map)].rename(columns=self.rename_map)
+
+            # Reglas de negocio. Los filtros que el lector ya aplicó en origen
+            # se vuelven a evaluar para DataFrames que no provienen de WorkbookReader
+            self.rules.record_pushdown(excluded)
+            result = self.rules.apply(result)
+
+            # Agregar identificador de filial como columna constante (categórica)
+            result['filial'] = pd.Categorical([filial] * len(result), categories=[filial])
+            apply_schema(result, self.dtypes)
+
             return {
                 'filial': filial,
-                'registros': registros
+                'dataframe': result
             }
         except Exception as e:
             logging.error(f"Error en la transformación de datos: {e}")
@@ -69,17 +129,16 @@ class ExcelProcessor:
             extracted_data (list): Lista de diccionarios con los datos extraídos
             
         Returns:
-            dict: Diccionario con las filiales procesadas y sus registros
+            dict: Diccionario con las filiales procesadas ('filiales') y un
+            DataFrame con todos los registros ('dataframe')
         """
         if not extracted_data:
             logging.error("No hay datos para procesar")
             return {}
         
-        # Estructura para almacenar datos transformados
-        transformed_data = {
-            'filiales': [],      # Lista de filiales únicas
-            'registros': []      # Lista de todos los registros procesados
-        }
+        # Lotes transformados (filial, DataFrame, SHA-256 y fuente de origen) en el orden de los archivos
+        batches = []
+        reused = 0
         
         # Procesar cada conjunto de datos extraído
         for data in extracted_data:
@@ -87,17 +146,24 @@ class ExcelProcessor:
                 logging.error("Estructura de datos inválida")
                 continue
             
+            # Partición reutilizada: los datos ya están transformados
+            if data.get('transformed'):
+                batches.append((data['filial'], data['dataframe'], data.get('sha256'), data.get('source')))
+                reused += 1
+                continue
+            
             # Aplicar transformación
-            result = self.transform_dataframe(data['dataframe'], data['filial'])
+            with metrics.file('transform', data.get('file') or str(data['filial'])) as record:
+                result = self.transform_dataframe(data['dataframe'], data['filial'], data.get('excluded'))
+                record.update(filial=data['filial'], rows_in=len(data['dataframe']),
+                              rows_out=len(result['dataframe']) if result else 0)
             if not result:
                 continue
-                
-            # Agregar filial si es nueva
-            if result['filial'] not in transformed_data['filiales']:
-                transformed_data['filiales'].append(result['filial'])
-            
-            # Agregar registros procesados
-            transformed_data['registros'].extend(result['registros'])
+            batches.append((result['filial'], result['dataframe'], data.get('sha256'), data.get('source')))
+            if self.partitions is not None:
+                self.partitions.put(data.get('sha256'), data.get('source'), result['filial'], result['dataframe'])
         
-        logging.info(f"Transformación completada. {len(transformed_data['registros'])} registros procesados de {len(transformed_data['filiales'])} filiales")
-        return transformed_data
\ No newline at end of file
+        transformed_data = build_transformed_data(batches)
+        self.rules.log_stats()
+        logging.info(f"Transformación completada. {len(transformed_data['dataframe'])} registros procesados de {len(transformed_data['filiales'])} filiales ({reused} particiones reutilizadas)")
+        return transformed_data
@@ -0,0 +1,84 @@
+"""
+Configuración común de las pruebas del proceso ETL.
+Cada prueba trabaja en una carpeta temporal: las rutas de datos de
+config.json se redirigen a ella (como benchmarks/suite.py isolate_config) y
+las fuentes son libros sintéticos (benchmarks/generator.py) servidos por el
+servidor de prueba local (fuente de tipo 'fixture').
+"""
+
+import os
+import sys
+import glob
+
+import pytest
+
+# Añadir el proyecto y el directorio src al path de Python de forma dinámica
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (project_root, os.path.join(project_root, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from config_loader import config
+from benchmarks.generator import generate_workbook
+
+# URL sin servidor: la descarga falla de inmediato (conexión rechazada)
+FAILING_SOURCE = 'http://127.0.0.1:9/caida.xlsx'
+
+
+@pytest.fixture
+def etl(tmp_path, monkeypatch):
+    """
+    Entorno aislado para ejecutar el proceso ETL completo. Las secciones de
+    la configuración se modifican con monkeypatch y se restauran al terminar.
+    """
+    return EtlEnvironment(str(tmp_path), monkeypatch)
+
+
+class EtlEnvironment:
+    """Carpeta de trabajo, fuentes y ejecución del proceso ETL para una prueba"""
+
+    def __init__(self, work_dir, monkeypatch):
+        self.work_dir = work_dir
+        self.monkeypatch = monkeypatch
+        self.sources_dir = os.path.join(work_dir, 'sources')
+        os.makedirs(self.sources_dir)
+
+        project = config.paths['project_root']
+        for key, path in list(config.paths.items()):
+            if key in ('project_root', 'sql_connection_dir'):
+                continue
+            monkeypatch.setitem(config.paths, key, os.path.join(work_dir, os.path.relpath(path, project)))
+        # Un solo intento por fuente y sin espera entre intentos
+        monkeypatch.setitem(config.download, 'max_retries', 1)
+        monkeypatch.setitem(config.download, 'retry_backoff', 0)
+        monkeypatch.setitem(config.metrics, 'enabled', False)
+        self.set_sources()
+        self.set_mode('serial')
+
+    def set_sources(self, *extra):
+        """Fuentes configuradas: las indicadas en 'extra' y luego el servidor de prueba"""
+        self.monkeypatch.setitem(config.config_data, 'excel_urls',
+                                 list(extra) + [{'type': 'fixture', 'directory': self.sources_dir}])
+
+    def set_mode(self, mode):
+        """'serial', 'process' o 'pipeline' (como 'cli.py run --mode')"""
+        self.monkeypatch.setitem(config.pipeline, 'enabled', mode == 'pipeline')
+        if mode != 'pipeline':
+            self.monkeypatch.setitem(config.processing, 'mode', mode)
+
+    def add_workbook(self, name, filial, rows=40, seed=0):
+        """Genera un libro de la filial indicada entre las fuentes del servidor de prueba"""
+        return generate_workbook(os.path.join(self.sources_dir, name), filial, rows, seed=seed)
+
+    def run(self, resume=None):
+        """Ejecuta el proceso ETL completo (main.main) en la carpeta de trabajo"""
+        from main import main
+        main(resume)
+
+    def consolidated(self):
+        """Último consolidado escrito, o None si todavía no hay ninguno"""
+        import pandas as pd
+        files = glob.glob(os.path.join(config.summary_dir, 'consolidated_*.xlsx'))
+        if not files:
+            return None
+        return pd.read_excel(max(files, key=os.path.getmtime))
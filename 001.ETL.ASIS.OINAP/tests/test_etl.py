@@ -0,0 +1,97 @@
+"""
+Pruebas de punta a punta del proceso ETL sobre el servidor de prueba local
+"""
+
+import os
+
+import pytest
+
+from config_loader import config
+from benchmarks.generator import generate_workbook
+from extract.fixture_server import start_server
+from conftest import FAILING_SOURCE
+
+
+@pytest.mark.parametrize('mode', ['serial', 'process', 'pipeline'])
+def test_failed_source_does_not_shift_later_files(etl, mode):
+    """
+    Una fuente que no se puede descargar no debe desplazar el unique_id de
+    las siguientes: cada archivo se procesa con su propio hash y filial.
+    """
+    etl.add_workbook('a.xlsx', 'Lima', seed=1)
+    etl.add_workbook('b.xlsx', 'Cusco', seed=2)
+    etl.set_sources(FAILING_SOURCE)
+    etl.set_mode(mode)
+
+    etl.run()
+
+    consolidated = etl.consolidated()
+    assert consolidated is not None
+    assert set(consolidated['filial']) == {'Lima', 'Cusco'}
+
+
+def test_removed_and_renamed_filiales_leave_the_state(etl):
+    """
+    El consolidado histórico no conserva filiales cuya fuente se quitó de
+    la configuración o cuyo nombre de filial cambió; sí conserva la filial
+    de una fuente configurada cuya descarga falló.
+    """
+    etl.add_workbook('a.xlsx', 'Lima', seed=1)
+    etl.add_workbook('b.xlsx', 'Cusco', seed=2)
+    etl.add_workbook('c.xlsx', 'Piura', seed=3)
+    etl.run()
+    assert set(etl.consolidated()['filial']) == {'Lima', 'Cusco', 'Piura'}
+
+    # Fuente quitada (el resto no cambió)
+    os.remove(os.path.join(etl.sources_dir, 'b.xlsx'))
+    etl.run()
+    assert set(etl.consolidated()['filial']) == {'Lima', 'Piura'}
+
+    # Cambio del nombre de la filial en el mismo archivo
+    etl.add_workbook('c.xlsx', 'Piura Norte', seed=3)
+    etl.run()
+    assert set(etl.consolidated()['filial']) == {'Lima', 'Piura Norte'}
+
+    # Fuente configurada cuya descarga falla: su filial se conserva
+    other_dir = os.path.join(etl.work_dir, 'other')
+    generate_workbook(os.path.join(other_dir, 'd.xlsx'), 'Tacna', 40, seed=5)
+    server, base_url = start_server(other_dir)
+    etl.set_sources(f"{base_url}/d.xlsx")
+    etl.run()
+    assert set(etl.consolidated()['filial']) == {'Lima', 'Piura Norte', 'Tacna'}
+
+    server.shutdown()
+    server.server_close()
+    etl.add_workbook('a.xlsx', 'Lima', seed=4)
+    etl.run()
+    assert set(etl.consolidated()['filial']) == {'Lima', 'Piura Norte', 'Tacna'}
+
+
+def test_failed_load_is_not_recorded_as_unchanged(etl, monkeypatch):
+    """
+    Si la carga falla, la siguiente ejecución normal vuelve a procesar las
+    fuentes (no las da por procesadas) y genera la salida; recién después
+    de una carga exitosa se omiten las fuentes sin cambios.
+    """
+    from load.sinks import XlsxSink
+
+    etl.add_workbook('a.xlsx', 'Lima', seed=1)
+    etl.add_workbook('b.xlsx', 'Cusco', seed=2)
+
+    def failing_write(self, df, output_dir, name):
+        raise OSError("disco lleno")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(XlsxSink, 'write', failing_write)
+        etl.run()
+    assert etl.consolidated() is None
+
+    etl.run()
+    consolidated = etl.consolidated()
+    assert consolidated is not None
+    assert set(consolidated['filial']) == {'Lima', 'Cusco'}
+
+    # Sin cambios después de una carga exitosa: no se genera otra salida
+    before = set(os.listdir(config.summary_dir))
+    etl.run()
+    assert set(os.listdir(config.summary_dir)) == before
@@ -0,0 +1,33 @@
+"""
+Pruebas de la fase de extracción
+"""
+
+import os
+import shutil
+
+from config_loader import config
+from extract.download_index import compute_sha256
+
+
+def test_manifest_hash_is_used_only_for_its_own_file(etl):
+    """
+    El hash del manifiesto solo se reutiliza para el archivo de ese
+    unique_id; para cualquier otro archivo se calcula sobre el disco.
+    """
+    from extract.extract import ExcelDownloader
+
+    lima = etl.add_workbook('a.xlsx', 'Lima', seed=1)
+    cusco = etl.add_workbook('b.xlsx', 'Cusco', seed=2)
+    downloader = ExcelDownloader(config.data_dir)
+    downloaded = downloader.prepare_files([lima, cusco])
+    assert [unique_id for unique_id, _ in downloaded] == [1, 2]
+
+    (_, first), (_, second) = downloaded
+    assert downloader.file_sha256(first, 1) == downloader.manifest[1]['sha256'] == compute_sha256(lima)
+    # Archivo de la fuente 2 consultado con el unique_id de la fuente 1
+    assert downloader.file_sha256(second, 1) == compute_sha256(cusco)
+
+    # Un archivo fuera de la ejecución con el mismo nombre tampoco usa el manifiesto
+    other = os.path.join(etl.work_dir, os.path.basename(first))
+    shutil.copy(cusco, other)
+    assert downloader.file_sha256(other, 1) == compute_sha256(cusco)